@@ -0,0 +1,217 @@
+import base64
+import heapq
+import io
+import queue
+import threading
+import time
+from datetime import datetime
+from collections import Counter, deque
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+EMAILJS_URL = "https://api.emailjs.com/api/v1.0/email/send"
+
+
+def format_detections(detections) -> str:
+    """One line of alert text per detection"""
+    detection_text = []
+    for det in detections:
+        if det['class'] == 'vehicle':
+            detection_text.append(f"Vehicle detected - Confidence: {det['confidence']:.2%}")
+        elif det['class'] == 'person':
+            detection_text.append(f"Person detected - Confidence: {det['confidence']:.2%}")
+        elif det['class'] == 'motion':
+            detection_text.append(f"Motion detected in zones: {det.get('zones', [])}")
+    return "\n".join(detection_text)
+
+
+def encode_thumbnail(image, size: Tuple[int, int] = (320, 240), quality: int = 70) -> str:
+    """JPEG thumbnail of a PIL image as a data URI"""
+    thumb = image.convert('RGB')
+    thumb.thumbnail(size)
+    buffered = io.BytesIO()
+    thumb.save(buffered, format="JPEG", quality=quality)
+    img_str = base64.b64encode(buffered.getvalue()).decode()
+    return f"data:image/jpeg;base64,{img_str}"
+
+
+def build_payload(service_id, template_id, user_id, detection_text, image_uri) -> Dict:
+    return {
+        "service_id": service_id,
+        "template_id": template_id,
+        "user_id": user_id,
+        "template_params": {
+            "detection_results": detection_text,
+            "image": image_uri,
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+    }
+
+
+class EmailJSTransport:
+    """Posts alert payloads over a pooled, reused HTTP session"""
+
+    def __init__(self, url: str = EMAILJS_URL, timeout: float = 10.0, pool_size: int = 4):
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def send(self, payload: Dict) -> bool:
+        response = self.session.post(self.url, json=payload, timeout=self.timeout)
+        return response.status_code == 200
+
+    def close(self):
+        self.session.close()
+
+
+class AlertDispatcher:
+    """Background alert sender that never blocks frame processing
+
+    ``submit`` only enqueues (dropping the alert if the bounded queue is
+    full).  A worker thread coalesces alerts per camera and recipient
+    for ``coalesce_window`` seconds into one message carrying the latest
+    frame as a JPEG thumbnail, then sends it through ``transport``.  A
+    failed send is rescheduled with exponential backoff rather than
+    retried in place, so one failing camera does not hold up the others.
+    Any object with ``send(payload) -> bool`` can be used as the
+    transport.  The EmailJS ids given here are defaults; ``submit`` can
+    override them per alert.  A coalesced alert keeps per-class counts plus
+    only the first and last ``keep_detections`` detections, so a busy
+    source cannot grow one message without bound.
+    """
+
+    def __init__(self, transport, service_id=None, template_id=None, user_id=None,
+                 coalesce_window: float = 5.0, max_queue: int = 100,
+                 max_retries: int = 3, backoff: float = 1.0, keep_detections: int = 10,
+                 thumbnail_size: Tuple[int, int] = (320, 240), jpeg_quality: int = 70):
+        self.transport = transport
+        self.service_id = service_id
+        self.template_id = template_id
+        self.user_id = user_id
+        self.coalesce_window = coalesce_window
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.keep_detections = keep_detections
+        self.thumbnail_size = thumbnail_size
+        self.jpeg_quality = jpeg_quality
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._pending: Dict[Hashable, Dict] = {}
+        # (due, sequence, camera, payload, attempts so far)
+        self._retries: List[Tuple[float, int, Hashable, Dict, int]] = []
+        self._retry_seq = 0
+        self._running = True
+        self._stats_lock = threading.Lock()
+        self.stats = {'queued': 0, 'dropped': 0, 'rejected': 0, 'sent': 0, 'failed': 0,
+                      'retries': 0}
+        self._worker = threading.Thread(target=self._run, name='alerts', daemon=True)
+        self._worker.start()
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def submit(self, camera: Hashable, image, detections, service_id=None,
+               template_id=None, user_id=None) -> bool:
+        """Queue an alert; returns False if it was dropped or the dispatcher is closed"""
+        if not self._running:
+            self._count('rejected')
+            print(f"Error sending alert: dispatcher is closed, alert for {camera} rejected")
+            return False
+        recipient = (service_id or self.service_id, template_id or self.template_id,
+                     user_id or self.user_id)
+        try:
+            self._queue.put_nowait((camera, recipient, image, list(detections), time.monotonic()))
+            self._count('queued')
+            return True
+        except queue.Full:
+            self._count('dropped')
+            return False
+
+    def _collect(self, camera, recipient, image, detections, received):
+        pending = self._pending.get((camera, recipient))
+        if pending is None:
+            pending = self._pending[(camera, recipient)] = {
+                'image': image,
+                'first': [],
+                'last': deque(maxlen=self.keep_detections),
+                'counts': Counter(),
+                'due': received + self.coalesce_window
+            }
+        pending['image'] = image
+        for det in detections:
+            pending['counts'][det['class']] += 1
+            if len(pending['first']) < self.keep_detections:
+                pending['first'].append(det)
+            else:
+                pending['last'].append(det)
+
+    def _run(self):
+        while self._running or self._pending or self._retries or not self._queue.empty():
+            timeout = 0.5
+            dues = [p['due'] for p in self._pending.values()]
+            if self._retries:
+                dues.append(self._retries[0][0])
+            if dues:
+                timeout = max(0.0, min(timeout, min(dues) - time.monotonic()))
+            try:
+                self._collect(*self._queue.get(timeout=timeout))
+            except queue.Empty:
+                pass
+
+            now = time.monotonic()
+            for key in [k for k, p in self._pending.items()
+                        if p['due'] <= now or not self._running]:
+                camera, recipient = key
+                self._attempt(camera, self._payload(camera, recipient, self._pending.pop(key)), 0)
+            while self._retries and (self._retries[0][0] <= now or not self._running):
+                _, _, camera, payload, attempts = heapq.heappop(self._retries)
+                self._count('retries')
+                self._attempt(camera, payload, attempts)
+
+    def _payload(self, camera, recipient, pending) -> Dict:
+        detection_text = format_detections(pending['first'])
+        skipped = sum(pending['counts'].values()) - len(pending['first']) - len(pending['last'])
+        if skipped > 0:
+            totals = ", ".join(f"{cls}: {n}" for cls, n in pending['counts'].most_common())
+            detection_text += f"\n... {skipped} more detections (totals - {totals}) ..."
+        if pending['last']:
+            detection_text += "\n" + format_detections(pending['last'])
+        if camera is not None:
+            detection_text = f"Camera: {camera}\n{detection_text}"
+        try:
+            image_uri = encode_thumbnail(pending['image'], self.thumbnail_size, self.jpeg_quality)
+        except Exception as e:
+            print(f"Error encoding alert image: {str(e)}")
+            image_uri = ""
+        service_id, template_id, user_id = recipient
+        return build_payload(service_id, template_id, user_id, detection_text, image_uri)
+
+    def _attempt(self, camera, payload, attempts) -> bool:
+        """Send once; on failure queue a retry after the backoff delay"""
+        try:
+            if self.transport.send(payload):
+                self._count('sent')
+                return True
+        except Exception as e:
+            print(f"Error sending alert: {str(e)}")
+        if attempts < self.max_retries and self._running:
+            due = time.monotonic() + self.backoff * (2 ** attempts)
+            heapq.heappush(self._retries, (due, self._retry_seq, camera, payload, attempts + 1))
+            self._retry_seq += 1
+        else:
+            self._count('failed')
+        return False
+
+    def close(self, timeout: Optional[float] = 5.0):
+        """Flush pending alerts, stop the worker and close the transport"""
+        self._running = False
+        self._worker.join(timeout)
+        close = getattr(self.transport, 'close', None)
+        if close is not None:
+            close()
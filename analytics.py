@@ -0,0 +1,174 @@
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from retention import DAY, HOUR, refresh_rollups
+
+
+class AnalyticsEngine:
+    """Dashboard queries answered from the hourly detection rollups
+
+    Every query reads ``detection_rollups`` (one row per hour, camera,
+    class and zone) rather than the raw detections, so the cost depends
+    on the time range, not on the number of events.  ``refresh`` folds
+    only the events added since the previous refresh into the rollups;
+    queries trigger it at most once per ``refresh_interval`` seconds and
+    results are cached until the rollups change.  Time bounds are
+    widened to whole hours, the rollup granularity, so repeated
+    "last N hours" queries share a cache entry.
+    """
+
+    def __init__(self, db, refresh_interval: float = 5.0, max_cached: int = 256):
+        self.db = db
+        self.refresh_interval = refresh_interval
+        self.max_cached = max_cached
+        self._lock = threading.Lock()
+        self._last_refresh = 0.0
+        self._cache: Dict[tuple, object] = {}
+
+    def refresh(self, force: bool = False) -> int:
+        """Fold new detections into the rollups; returns how many"""
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._last_refresh < self.refresh_interval:
+                return 0
+            self._last_refresh = now
+        with self.db.pool.writer() as conn:
+            added = refresh_rollups(conn)
+        if added:
+            self.invalidate()
+        return added
+
+    def invalidate(self):
+        """Drop cached results, e.g. after rollups were rebuilt or pruned"""
+        self._cache.clear()
+
+    def _query(self, key: tuple, sql: str, params) -> List[tuple]:
+        self.refresh()
+        rows = self._cache.get(key)
+        if rows is None:
+            with self.db.pool.reader() as conn:
+                rows = conn.execute(sql, params).fetchall()
+            if len(self._cache) >= self.max_cached:
+                self._cache.clear()
+            self._cache[key] = rows
+        return rows
+
+    @staticmethod
+    def _hours(since, until) -> Tuple[Optional[int], Optional[int]]:
+        """``since`` floored and ``until`` ceiled to hour starts"""
+        if since is not None:
+            since = int(since // HOUR) * HOUR
+        if until is not None:
+            until = -int(-until // HOUR) * HOUR
+        return since, until
+
+    @staticmethod
+    def _filters(since, until, camera=None, cls=None, zone: Optional[str] = '= -1') -> Tuple[str, list]:
+        clauses, params = [], []
+        if zone is not None:
+            clauses.append(f"zone {zone}")
+        if since is not None:
+            clauses.append("hour_start >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("hour_start < ?")
+            params.append(until)
+        if camera is not None:
+            clauses.append("camera = ?")
+            params.append(camera)
+        if cls is not None:
+            clauses.append("class = ?")
+            params.append(cls)
+        return " AND ".join(clauses) or "1=1", params
+
+    def hourly_activity(self, since: Optional[float] = None, until: Optional[float] = None,
+                        camera: Optional[str] = None, cls: Optional[str] = None) -> List[int]:
+        """Detections per local hour of day (24 bins)"""
+        since, until = self._hours(since, until)
+        where, params = self._filters(since, until, camera, cls)
+        rows = self._query(
+            ('hourly', since, until, camera, cls),
+            f"SELECT hour_start, SUM(count) FROM detection_rollups WHERE {where} GROUP BY hour_start",
+            params
+        )
+        hours = np.zeros(24, dtype=np.int64)
+        if rows:
+            starts, counts = np.array(rows, dtype=np.int64).T
+            local_hours = [datetime.fromtimestamp(t).hour for t in starts.tolist()]
+            np.add.at(hours, local_hours, counts)
+        return hours.tolist()
+
+    def timeline(self, since: Optional[float] = None, until: Optional[float] = None,
+                 camera: Optional[str] = None, cls: Optional[str] = None) -> List[Tuple[int, int]]:
+        """(hour_start, count) pairs in time order"""
+        since, until = self._hours(since, until)
+        where, params = self._filters(since, until, camera, cls)
+        return self._query(
+            ('timeline', since, until, camera, cls),
+            f"SELECT hour_start, SUM(count) FROM detection_rollups WHERE {where} "
+            "GROUP BY hour_start ORDER BY hour_start",
+            params
+        )
+
+    def class_counts(self, since: Optional[float] = None, until: Optional[float] = None,
+                     camera: Optional[str] = None) -> Dict[str, int]:
+        since, until = self._hours(since, until)
+        where, params = self._filters(since, until, camera)
+        rows = self._query(
+            ('classes', since, until, camera),
+            f"SELECT class, SUM(count) FROM detection_rollups WHERE {where} GROUP BY class",
+            params
+        )
+        return dict(rows)
+
+    def zone_heatmap(self, grid: Tuple[int, int] = (3, 3), since: Optional[float] = None,
+                     until: Optional[float] = None, camera: Optional[str] = None,
+                     cls: Optional[str] = None) -> np.ndarray:
+        """(rows, cols) array of detections per grid zone; zone ids are row-major"""
+        since, until = self._hours(since, until)
+        where, params = self._filters(since, until, camera, cls, zone='>= 0')
+        rows = self._query(
+            ('zones', since, until, camera, cls),
+            f"SELECT zone, SUM(count) FROM detection_rollups WHERE {where} GROUP BY zone",
+            params
+        )
+        heatmap = np.zeros(grid[0] * grid[1], dtype=np.int64)
+        for zone, count in rows:
+            if zone < heatmap.size:
+                heatmap[zone] = count
+        return heatmap.reshape(grid)
+
+    def camera_trends(self, since: Optional[float] = None, until: Optional[float] = None,
+                      bucket: int = DAY, cls: Optional[str] = None) -> Dict[str, List[Tuple[int, int]]]:
+        """Per-camera (bucket_start, count) series; ``bucket`` is in seconds"""
+        bucket = max(HOUR, int(bucket) // HOUR * HOUR)
+        since, until = self._hours(since, until)
+        where, params = self._filters(since, until, cls=cls)
+        rows = self._query(
+            ('cameras', since, until, bucket, cls),
+            f"SELECT camera, hour_start / ? * ?, SUM(count) FROM detection_rollups "
+            f"WHERE {where} GROUP BY 1, 2 ORDER BY 1, 2",
+            [bucket, bucket] + params
+        )
+        trends: Dict[str, List[Tuple[int, int]]] = {}
+        for camera, start, count in rows:
+            trends.setdefault(camera, []).append((start, count))
+        return trends
+
+    def summary(self, since: Optional[float] = None, until: Optional[float] = None) -> Dict:
+        """Headline numbers for the dashboard"""
+        classes = self.class_counts(since, until)
+        trends = self.camera_trends(since, until)
+        last_hour = self.timeline(time.time() - HOUR)
+        return {
+            'total_detections': sum(classes.values()),
+            'vehicle_count': classes.get('vehicle', 0),
+            'person_count': classes.get('person', 0),
+            'motion_events': classes.get('motion', 0),
+            'cameras': len(trends),
+            'last_hour': sum(count for _, count in last_hour)
+        }
@@ -1,41 +1,184 @@
 import streamlit as st
 import hashlib
 import hmac
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
 from database import Database
 
+ALGORITHM = "pbkdf2_sha256"
+DEFAULT_ITERATIONS = 310000
+
+# Hashes written before per-user salts: bare hex digest of this salt
+LEGACY_SALT = b"secure_salt_value"
+LEGACY_ITERATIONS = 100000
+
+# Signs session tokens when no SSV_SESSION_SECRET is configured; lives as
+# long as the process, so tokens survive Streamlit reruns
+_PROCESS_SECRET = secrets.token_bytes(32)
+
+
+def derive_key(password, salt, iterations):
+    return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations)
+
+
+def encode_hash(salt, iterations, digest):
+    """Stored form: ``pbkdf2_sha256$<iterations>$<salt hex>$<digest hex>``"""
+    return f"{ALGORITHM}${iterations}${salt.hex()}${digest.hex()}"
+
+
+def decode_hash(stored):
+    """(salt, iterations, digest) of a stored hash, including legacy ones"""
+    if '$' not in stored:
+        return LEGACY_SALT, LEGACY_ITERATIONS, bytes.fromhex(stored)
+    algorithm, iterations, salt, digest = stored.split('$')
+    if algorithm != ALGORITHM:
+        raise ValueError(f"Unsupported password hash: {algorithm}")
+    return bytes.fromhex(salt), int(iterations), bytes.fromhex(digest)
+
+
 class Auth:
-    def __init__(self):
-        self.db = Database()
+    """Password login with salted PBKDF2 and signed session tokens
+
+    Every user gets a random salt, and the work factor is stored with the
+    hash, so raising ``iterations`` re-hashes old passwords on their next
+    successful login.  Key derivation runs on a small shared worker pool
+    (at most ``max_pending`` requests queued) instead of the Streamlit
+    thread.  A verified login is kept in the session as an HMAC-signed
+    token valid for ``session_ttl`` seconds, which reruns check without
+    touching the password hash.  A rerun with less than ``refresh_margin``
+    seconds left re-issues the token, so active sessions do not expire.
+    """
+
+    _executor = None
+    _executor_lock = threading.Lock()
+
+    def __init__(self, db=None, iterations=DEFAULT_ITERATIONS, workers=2,
+                 max_pending=8, session_ttl=900.0, refresh_margin=None, secret=None):
+        self.db = db if db is not None else Database()
+        self.iterations = iterations
+        self.session_ttl = session_ttl
+        self.refresh_margin = session_ttl / 2 if refresh_margin is None else refresh_margin
+        secret = secret or os.environ.get('SSV_SESSION_SECRET')
+        self.secret = secret.encode('utf-8') if secret else _PROCESS_SECRET
+        self._pending = threading.BoundedSemaphore(max_pending)
+        with Auth._executor_lock:
+            if Auth._executor is None:
+                Auth._executor = ThreadPoolExecutor(max_workers=workers,
+                                                    thread_name_prefix='auth-hash')
+
+    def _derive(self, password, salt, iterations, timeout=30.0):
+        """Run the key derivation on the hashing pool
+
+        None if the pool is saturated or the result does not arrive within
+        ``timeout``; the slot stays taken until the derivation finishes.
+        """
+        if not self._pending.acquire(blocking=False):
+            return None
+        try:
+            future = Auth._executor.submit(derive_key, password, salt, iterations)
+        except Exception:
+            self._pending.release()
+            raise
+        future.add_done_callback(lambda _: self._pending.release())
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            return None
 
     def hash_password(self, password):
-        """Create a secure hash of the password"""
-        salt = b"secure_salt_value"  # In production, use a proper salt
-        return hashlib.pbkdf2_hmac(
-            'sha256', 
-            password.encode('utf-8'), 
-            salt, 
-            100000
-        ).hex()
+        """Create a salted hash of the password in its stored form"""
+        salt = secrets.token_bytes(16)
+        digest = self._derive(password, salt, self.iterations)
+        if digest is None:
+            return None
+        return encode_hash(salt, self.iterations, digest)
+
+    def verify_password(self, password, stored):
+        """(matches, needs_rehash) for a password against a stored hash
+
+        ``matches`` is None when the hashing pool is too busy to check.
+        """
+        try:
+            salt, iterations, expected = decode_hash(stored)
+        except ValueError as e:
+            print(f"Error reading password hash: {str(e)}")
+            return False, False
+        digest = self._derive(password, salt, iterations)
+        if digest is None:
+            return None, False
+        matches = hmac.compare_digest(digest, expected)
+        return matches, matches and ('$' not in stored or iterations < self.iterations)
+
+    def issue_token(self, username):
+        expires = int(time.time() + self.session_ttl)
+        payload = f"{username}|{expires}"
+        signature = hmac.new(self.secret, payload.encode('utf-8'), hashlib.sha256).hexdigest()
+        return f"{payload}|{signature}"
+
+    def read_token(self, token):
+        """(username, expires) of a valid, unexpired token, else None"""
+        if not token:
+            return None
+        try:
+            username, expires, signature = token.rsplit('|', 2)
+            expires = int(expires)
+        except ValueError:
+            return None
+        payload = f"{username}|{expires}"
+        expected = hmac.new(self.secret, payload.encode('utf-8'), hashlib.sha256).hexdigest()
+        if not hmac.compare_digest(signature, expected) or expires < time.time():
+            return None
+        return username, expires
+
+    def verify_token(self, token):
+        """Username of a valid, unexpired token, else None"""
+        claims = self.read_token(token)
+        return claims[0] if claims else None
 
     def login_user(self, username, password):
-        """Verify user credentials and log them in"""
+        """Verify user credentials and log them in; returns (success, message)"""
         user = self.db.get_user(username)
-        if user and hmac.compare_digest(
-            user['password_hash'],
-            self.hash_password(password)
-        ):
-            st.session_state['logged_in'] = True
-            st.session_state['username'] = username
-            return True
-        return False
+        if not user:
+            return False, "Invalid credentials"
+        matches, needs_rehash = self.verify_password(password, user['password_hash'])
+        if matches is None:
+            return False, "Server busy, please try again"
+        if not matches:
+            return False, "Invalid credentials"
+        if needs_rehash:
+            password_hash = self.hash_password(password)
+            if password_hash is not None:
+                self.db.update_password_hash(username, password_hash)
+        st.session_state['logged_in'] = True
+        st.session_state['username'] = username
+        st.session_state['auth_token'] = self.issue_token(username)
+        return True, "Welcome to Sixth Sense Vision!"
+
+    def is_logged_in(self):
+        """Check the session token, sliding it forward when close to expiry
+
+        An expired or forged token logs out.
+        """
+        claims = self.read_token(st.session_state.get('auth_token'))
+        if claims is None or claims[0] != st.session_state.get('username'):
+            self.logout_user()
+            return False
+        if claims[1] - time.time() < self.refresh_margin:
+            st.session_state['auth_token'] = self.issue_token(claims[0])
+        return True
 
     def register_user(self, username, password):
         """Register a new user"""
         if not username or not password:
             return False, "Username and password are required"
-        
+
+        password_hash = self.hash_password(password)
+        if password_hash is None:
+            return False, "Server busy, please try again"
         try:
-            password_hash = self.hash_password(password)
             self.db.add_user(username, password_hash)
             return True, "Registration successful"
         except Exception as e:
@@ -45,3 +188,4 @@ class Auth:
         """Log out the current user"""
         st.session_state['logged_in'] = False
         st.session_state['username'] = None
+        st.session_state['auth_token'] = None
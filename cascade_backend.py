@@ -0,0 +1,169 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Tuple
+
+import cv2
+import numpy as np
+
+# name -> (cascade file, detectMultiScale keyword arguments)
+DEFAULT_CASCADES = {
+    'vehicle': ('haarcascade_car.xml',
+                {'scaleFactor': 1.1, 'minNeighbors': 5, 'minSize': (30, 30)}),
+    'person': ('haarcascade_frontalface_default.xml',
+               {'scaleFactor': 1.1, 'minNeighbors': 5, 'minSize': (30, 30)}),
+}
+
+# Per-process state populated by _init_worker
+_worker_cascades = {}
+_worker_params = {}
+
+
+def cascade_path(filename: str) -> str:
+    """Resolve a cascade file against OpenCV's bundled haarcascades"""
+    if os.path.isabs(filename):
+        return filename
+    return cv2.data.haarcascades + filename
+
+
+def scaled_params(params: Dict, scale: float) -> Dict:
+    """detectMultiScale arguments for a frame resized by ``scale``
+
+    ``minSize``/``maxSize`` are given in full-resolution pixels, so they
+    shrink with the frame; otherwise a half-size frame would only find
+    objects twice as large.
+    """
+    if scale == 1.0:
+        return params
+    params = dict(params)
+    for key in ('minSize', 'maxSize'):
+        if key in params:
+            params[key] = tuple(max(1, int(round(v * scale))) for v in params[key])
+    return params
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 has no track flag; pool workers share the
+        # parent's resource tracker, so the duplicate registration is
+        # cleared when the parent unlinks the segment
+        return shared_memory.SharedMemory(name=name)
+
+
+def _init_worker(specs):
+    """Load every cascade once when the worker process starts"""
+    cv2.setNumThreads(1)
+    for name, (filename, params) in specs.items():
+        _worker_cascades[name] = cv2.CascadeClassifier(cascade_path(filename))
+        _worker_params[name] = params
+
+
+def _detect_shared(cascade_name: str, segment_name: str, shape: Tuple[int, int],
+                   scale: float = 1.0):
+    cascade = _worker_cascades[cascade_name]
+    if cascade.empty():
+        return cascade_name, np.empty((0, 4), dtype=np.int32)
+    # Mapped only for the call, so no worker holds a segment past shutdown
+    segment = _attach(segment_name)
+    try:
+        gray = np.ndarray(shape, dtype=np.uint8, buffer=segment.buf)
+        boxes = cascade.detectMultiScale(gray, **scaled_params(_worker_params[cascade_name], scale))
+        del gray
+    finally:
+        segment.close()
+    return cascade_name, np.asarray(boxes, dtype=np.int32).reshape(-1, 4)
+
+
+class SerialCascadeBackend:
+    """Runs each cascade in turn in the calling thread"""
+
+    def __init__(self, specs: Dict = None):
+        self.specs = dict(specs or DEFAULT_CASCADES)
+        self.cascades = {
+            name: cv2.CascadeClassifier(cascade_path(filename))
+            for name, (filename, _) in self.specs.items()
+        }
+
+    def detect(self, gray: np.ndarray, scale: float = 1.0) -> Dict[str, np.ndarray]:
+        """Boxes per cascade; ``scale`` is the frame's size relative to full resolution"""
+        results = {}
+        for name, (_, params) in self.specs.items():
+            cascade = self.cascades[name]
+            if cascade.empty():
+                # Missing cascade file; skip rather than fail the frame
+                results[name] = np.empty((0, 4), dtype=np.int32)
+                continue
+            boxes = cascade.detectMultiScale(gray, **scaled_params(params, scale))
+            results[name] = np.asarray(boxes, dtype=np.int32).reshape(-1, 4)
+        return results
+
+    def close(self):
+        pass
+
+
+class ProcessCascadeBackend:
+    """Runs all cascades concurrently in a process pool
+
+    Workers load their cascades once in the pool initializer.  Frames are
+    copied into shared memory segments that the workers map directly, so
+    only the segment name and the small result arrays cross process
+    boundaries.  Each ``detect`` call checks a segment out of a free list
+    and returns it afterwards; only the checkout is locked, so cameras
+    sharing the backend run their cascades concurrently.
+    """
+
+    def __init__(self, specs: Dict = None, workers: int = None):
+        self.specs = dict(specs or DEFAULT_CASCADES)
+        self.workers = workers or min(len(self.specs), os.cpu_count() or 1)
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.specs,)
+        )
+        self._free: List[shared_memory.SharedMemory] = []
+        self._lock = threading.Lock()
+
+    def _checkout(self, nbytes: int) -> shared_memory.SharedMemory:
+        with self._lock:
+            fitting = [segment for segment in self._free if segment.size >= nbytes]
+            if fitting:
+                segment = min(fitting, key=lambda segment: segment.size)
+                self._free.remove(segment)
+                return segment
+            if self._free:
+                # Frames grew; retire the smallest idle segment instead of
+                # keeping one per size ever seen
+                self._release(min(self._free, key=lambda segment: segment.size))
+        return shared_memory.SharedMemory(create=True, size=nbytes)
+
+    def _checkin(self, segment: shared_memory.SharedMemory):
+        with self._lock:
+            self._free.append(segment)
+
+    def detect(self, gray: np.ndarray, scale: float = 1.0) -> Dict[str, np.ndarray]:
+        """Boxes per cascade; ``scale`` is the frame's size relative to full resolution"""
+        gray = np.ascontiguousarray(gray, dtype=np.uint8)
+        segment = self._checkout(gray.nbytes)
+        try:
+            np.ndarray(gray.shape, dtype=np.uint8, buffer=segment.buf)[...] = gray
+            futures = [
+                self._executor.submit(_detect_shared, name, segment.name, gray.shape, scale)
+                for name in self.specs
+            ]
+            return dict(future.result() for future in futures)
+        finally:
+            self._checkin(segment)
+
+    def _release(self, segment: shared_memory.SharedMemory):
+        self._free.remove(segment)
+        segment.close()
+        segment.unlink()
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            for segment in list(self._free):
+                self._release(segment)
@@ -0,0 +1,76 @@
+from typing import Dict, List, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+MAX_COLORS = 8  # one bit per color in a uint8 mask
+
+
+class ColorClassifier:
+    """Dominant-color lookup over HSV boxes in a single pass per frame
+
+    Every color is an axis-aligned HSV box, so the 3-D lookup "which
+    colors contain (h, s, v)" factorizes into one table per channel
+    holding a bitmask of colors, ANDed together.  A single ``cv2.LUT``
+    applies all three tables; one ``bincount`` over the resulting masks
+    of every (subsampled, every ``step`` pixels) box gives all color
+    counts at once.  A pixel inside overlapping boxes counts for each of
+    them, as with one ``cv2.inRange`` per color; ties go to the color
+    listed first.
+    """
+
+    def __init__(self, color_ranges: Dict[str, Tuple[Sequence[int], Sequence[int]]],
+                 step: int = 2, unknown: str = "unknown"):
+        if len(color_ranges) > MAX_COLORS:
+            raise ValueError(f"At most {MAX_COLORS} colors are supported")
+        self.colors = list(color_ranges)
+        self.unknown = unknown
+        self.step = max(1, step)
+
+        values = np.arange(256)
+        lut = np.zeros((1, 256, 3), dtype=np.uint8)
+        for bit, (lower, upper) in enumerate(color_ranges.values()):
+            for channel in range(3):
+                inside = (values >= lower[channel]) & (values <= upper[channel])
+                lut[0, inside, channel] |= np.uint8(1 << bit)
+        self.lut = lut
+
+        # Mask value -> which colors it counts for
+        self.mask_colors = ((values[:, None] >> np.arange(len(self.colors))) & 1).astype(np.int64)
+
+    def color_masks(self, hsv: np.ndarray) -> np.ndarray:
+        """Per-pixel color bitmasks for an (H, W, 3) uint8 HSV image"""
+        masks = cv2.LUT(hsv, self.lut)
+        return masks[..., 0] & masks[..., 1] & masks[..., 2]
+
+    def color_counts(self, frame: np.ndarray, bboxes: Sequence[Tuple[int, int, int, int]]) -> np.ndarray:
+        """(boxes, colors) pixel counts for x, y, w, h boxes of a BGR frame"""
+        crops = [
+            frame[max(y, 0):y + h:self.step, max(x, 0):x + w:self.step].reshape(-1, 3)
+            for x, y, w, h in bboxes
+        ]
+        sizes = [len(crop) for crop in crops]
+        if not sum(sizes):
+            return np.zeros((len(crops), len(self.colors)), dtype=np.int64)
+
+        # One row image: a single conversion and lookup for every box
+        pixels = np.concatenate(crops)[None]
+        masks = self.color_masks(cv2.cvtColor(pixels, cv2.COLOR_BGR2HSV))[0]
+        owners = np.repeat(np.arange(len(crops)) * 256, sizes)
+        histograms = np.bincount(owners + masks, minlength=len(crops) * 256).reshape(-1, 256)
+        return histograms @ self.mask_colors
+
+    def classify_boxes(self, frame: np.ndarray, bboxes: Sequence[Tuple[int, int, int, int]]) -> List[str]:
+        """Dominant color of every x, y, w, h box of a BGR frame"""
+        if not len(bboxes):
+            return []
+        counts = self.color_counts(frame, bboxes)
+        best = counts.argmax(axis=1)
+        found = counts[np.arange(len(counts)), best] > 0
+        return [self.colors[b] if ok else self.unknown
+                for b, ok in zip(best.tolist(), found.tolist())]
+
+    def classify(self, bgr_crop: np.ndarray) -> str:
+        """Dominant color of one BGR crop"""
+        h, w = bgr_crop.shape[:2]
+        return self.classify_boxes(bgr_crop, [(0, 0, w, h)])[0]
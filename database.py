@@ -1,14 +1,147 @@
+import asyncio
 import os
 import sqlite3
-from datetime import datetime
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from detection import DetectionBatch
+from plate_search import (ensure_search_schema, normalize_plate, resume_plate_index,
+                          search_page, suspend_plate_index)
+from retention import ensure_retention_schema
+from vehicle_import import chunked, iter_records, record_row
+
+DB_PATH = 'security_system.db'
+
+
+class ConnectionPool:
+    """Per-thread read connections plus one serialized writer connection
+
+    Readers never share a connection across threads, so Streamlit
+    sessions can query concurrently under WAL.  All writes go through a
+    single connection guarded by a lock, which is how SQLite serializes
+    writers anyway, minus the busy-retry churn.  Each connection keeps a
+    cache of ``cached_statements`` prepared statements.
+    """
+
+    def __init__(self, path=DB_PATH, mmap_size=256 * 1024 * 1024,
+                 cache_size_kib=64 * 1024, cached_statements=256, busy_timeout=5.0):
+        self.path = path
+        self.mmap_size = mmap_size
+        self.cache_size_kib = cache_size_kib
+        self.cached_statements = cached_statements
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._readers = {}  # thread -> read connection
+        self._readers_lock = threading.Lock()
+        self._writer = None
+        self._write_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self.metrics = {
+            'connections_opened': 0,
+            'reads': 0,
+            'writes': 0,
+            'write_wait_seconds': 0.0,
+            'max_write_wait_seconds': 0.0
+        }
+
+    def _open(self):
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout,
+            check_same_thread=False,
+            cached_statements=self.cached_statements
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        conn.execute(f"PRAGMA cache_size={-int(self.cache_size_kib)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        with self._metrics_lock:
+            self.metrics['connections_opened'] += 1
+        return conn
+
+    @contextmanager
+    def reader(self):
+        """This thread's read connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._open()
+            with self._readers_lock:
+                # Close connections left behind by threads that have exited
+                for thread in [t for t in self._readers if not t.is_alive()]:
+                    self._readers.pop(thread).close()
+                self._readers[threading.current_thread()] = conn
+        with self._metrics_lock:
+            self.metrics['reads'] += 1
+        yield conn
+
+    @contextmanager
+    def writer(self):
+        """The shared writer connection inside a transaction"""
+        started = time.perf_counter()
+        with self._write_lock:
+            waited = time.perf_counter() - started
+            with self._metrics_lock:
+                self.metrics['writes'] += 1
+                self.metrics['write_wait_seconds'] += waited
+                self.metrics['max_write_wait_seconds'] = max(
+                    self.metrics['max_write_wait_seconds'], waited
+                )
+            if self._writer is None:
+                self._writer = self._open()
+            with self._writer as conn:
+                yield conn
+
+    def stats(self):
+        with self._metrics_lock:
+            stats = dict(self.metrics)
+        stats['read_connections'] = len(self._readers)
+        stats['writer_busy'] = self._write_lock.locked()
+        return stats
+
+    def close(self):
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        with self._readers_lock:
+            for conn in self._readers.values():
+                conn.close()
+            self._readers.clear()
+        self._local = threading.local()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path=DB_PATH):
+    """Process-wide pool for a database file"""
+    key = os.path.abspath(path)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(path)
+        return pool
+
 
 class Database:
-    def __init__(self):
-        self.conn = sqlite3.connect('security_system.db')
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        # Every Database on the same file shares one pool (and one writer)
+        self.pool = get_pool(path)
         self.create_tables()
+        self.detection_writer = None
+
+    def start_detection_writer(self, batch_size=500, flush_interval=1.0):
+        """Start (once) the shared write-behind writer for detection events"""
+        if self.detection_writer is None:
+            self.detection_writer = DetectionWriter(self.pool, batch_size, flush_interval)
+        return self.detection_writer
 
     def create_tables(self):
-        with self.conn as conn:
+        with self.pool.writer() as conn:
             # Users table
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS users (
@@ -31,16 +164,60 @@ class Database:
                 )
             """)
 
+            # Detection events (epoch seconds; bbox columns are NULL for
+            # detections without a box, zones are a bitmask)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS detections (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    camera TEXT NOT NULL,
+                    class TEXT NOT NULL,
+                    confidence REAL,
+                    x1 INTEGER,
+                    y1 INTEGER,
+                    x2 INTEGER,
+                    y2 INTEGER,
+                    zone_mask INTEGER DEFAULT 0,
+                    track_id INTEGER,
+                    label TEXT,
+                    detected_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_detections_time
+                ON detections (detected_at)
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_detections_camera_time
+                ON detections (camera, detected_at)
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_detections_class_time
+                ON detections (class, detected_at)
+            """)
+
+            # Normalized plate column, search indexes and trigram index
+            self.plate_fts = ensure_search_schema(conn)
+
+            # Hourly rollups and the daily partition catalog
+            ensure_retention_schema(conn)
+
     def add_user(self, username, password_hash):
-        with self.conn as conn:
+        with self.pool.writer() as conn:
             cur = conn.execute(
                 "INSERT INTO users (username, password_hash) VALUES (?, ?)",
                 (username, password_hash)
             )
             return cur.lastrowid
 
+    def update_password_hash(self, username, password_hash):
+        with self.pool.writer() as conn:
+            conn.execute(
+                "UPDATE users SET password_hash = ? WHERE username = ?",
+                (password_hash, username)
+            )
+
     def get_user(self, username):
-        with self.conn as conn:
+        with self.pool.reader() as conn:
             cur = conn.execute("SELECT * FROM users WHERE username = ?", (username,))
             row = cur.fetchone()
             if row:
@@ -53,43 +230,246 @@ class Database:
             return None
 
     def add_vehicle_record(self, plate_number, owner_name=None, vehicle_type=None, notes=None):
-        with self.conn as conn:
+        with self.pool.writer() as conn:
             cur = conn.execute("""
                 INSERT INTO vehicle_records 
-                (plate_number, owner_name, vehicle_type, notes)
-                VALUES (?, ?, ?, ?)
-            """, (plate_number, owner_name, vehicle_type, notes))
+                (plate_number, owner_name, vehicle_type, notes, plate_normalized)
+                VALUES (?, ?, ?, ?, ?)
+            """, (plate_number, owner_name, vehicle_type, notes,
+                  normalize_plate(plate_number)))
             return cur.lastrowid
 
-    def search_vehicle_records(self, search_term, search_type="plate_number"):
+    def insert_vehicle_records(self, records):
+        """Insert many vehicle record dicts in a single transaction
+
+        Records without a plate number or with an unparseable
+        ``detected_at`` are skipped; a missing ``detected_at`` defaults to
+        the current time.
+        """
+        rows = []
+        rejected = 0
+        for record in records:
+            try:
+                row = record_row(record)
+            except (TypeError, ValueError, OverflowError, OSError):
+                rejected += 1
+                continue
+            if row is not None:
+                rows.append(row + (normalize_plate(row[0]),))
+        if rejected:
+            print(f"Error importing vehicle records: skipped {rejected} with an invalid detected_at")
+        if not rows:
+            return 0
+        with self.pool.writer() as conn:
+            conn.executemany("""
+                INSERT INTO vehicle_records
+                (plate_number, owner_name, vehicle_type, notes, detected_at, plate_normalized)
+                VALUES (?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP), ?)
+            """, rows)
+        return len(rows)
+
+    async def add_vehicle_records_many(self, records):
+        """Async insert that runs the transaction off the event loop"""
+        return await asyncio.to_thread(self.insert_vehicle_records, list(records))
+
+    def import_vehicle_records(self, path, chunk_size=5000, file_format=None):
+        """Stream a CSV or JSONL file into vehicle_records, one transaction per chunk
+
+        Per-row plate indexing is suspended for the load and the trigram
+        index is rebuilt once at the end.
+        """
+        if self.plate_fts:
+            with self.pool.writer() as conn:
+                suspend_plate_index(conn)
+        imported = 0
+        try:
+            for chunk in chunked(iter_records(path, file_format), chunk_size):
+                imported += self.insert_vehicle_records(chunk)
+        finally:
+            if self.plate_fts:
+                with self.pool.writer() as conn:
+                    resume_plate_index(conn)
+        return imported
+
+    def search_vehicle_records(self, search_term, search_type="plate_number", limit=100,
+                               match="contains"):
         """Search vehicle records by different criteria"""
-        with self.conn as conn:
-            if search_type == "Owner Name":
-                query = """
-                    SELECT * FROM vehicle_records 
-                    WHERE owner_name LIKE ? 
-                    ORDER BY detected_at DESC
-                """
-            elif search_type == "Vehicle Type":
-                query = """
-                    SELECT * FROM vehicle_records 
-                    WHERE vehicle_type LIKE ? 
-                    ORDER BY detected_at DESC
-                """
-            else:  # Default to plate number search
-                query = """
-                    SELECT * FROM vehicle_records 
-                    WHERE plate_number LIKE ? 
-                    ORDER BY detected_at DESC
-                """
-
-            cur = conn.execute(query, (f'%{search_term}%',))
-            rows = cur.fetchall()
-            return [{
-                'id': row[0],
-                'plate_number': row[1],
-                'detected_at': row[2],
-                'owner_name': row[3],
-                'vehicle_type': row[4],
-                'notes': row[5]
-            } for row in rows]
\ No newline at end of file
+        return self.search_vehicle_records_page(search_term, search_type, limit,
+                                                match=match)[0]
+
+    def search_vehicle_records_page(self, search_term, search_type="plate_number",
+                                    limit=100, cursor=None, match="contains"):
+        """One keyset-paginated page of search results and the next cursor
+
+        ``match`` ("contains", "prefix" or "exact") applies to owner name
+        and vehicle type searches; prefix and exact use their indexes.
+        """
+        with self.pool.reader() as conn:
+            return search_page(conn, search_term, search_type, limit, cursor,
+                               self.plate_fts, match)
+
+    def pool_stats(self):
+        """Connection pool metrics"""
+        return self.pool.stats()
+
+    def add_detections(self, camera, detections):
+        """Insert a batch of Detection records in one transaction"""
+        rows = detection_rows(camera, detections)
+        with self.pool.writer() as conn:
+            conn.executemany(INSERT_DETECTION, rows)
+        return len(rows)
+
+    def get_detections(self, camera=None, since=None, until=None, limit=1000):
+        """Recent detections, newest first, optionally filtered"""
+        query = "SELECT * FROM detections WHERE 1=1"
+        params = []
+        if camera is not None:
+            query += " AND camera = ?"
+            params.append(camera)
+        if since is not None:
+            query += " AND detected_at >= ?"
+            params.append(since)
+        if until is not None:
+            query += " AND detected_at < ?"
+            params.append(until)
+        query += " ORDER BY detected_at DESC LIMIT ?"
+        params.append(limit)
+
+        with self.pool.reader() as conn:
+            cur = conn.execute(query, params)
+            columns = [c[0] for c in cur.description]
+            return [dict(zip(columns, row)) for row in cur.fetchall()]
+
+
+INSERT_DETECTION = """
+    INSERT INTO detections
+    (camera, class, confidence, x1, y1, x2, y2, zone_mask, track_id, label, detected_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def detection_rows(camera, detections):
+    """Convert Detection records to detections table rows"""
+    columns = DetectionBatch.from_detections(detections).to_columns()
+    has_box = columns['x1'] >= 0
+    return [
+        (camera, cls, conf,
+         x1 if box else None, y1 if box else None,
+         x2 if box else None, y2 if box else None,
+         zones, track if track >= 0 else None, label, ts)
+        for cls, conf, x1, y1, x2, y2, box, zones, track, label, ts in zip(
+            columns['class'].tolist(), columns['confidence'].astype(float).round(4).tolist(),
+            columns['x1'].tolist(), columns['y1'].tolist(),
+            columns['x2'].tolist(), columns['y2'].tolist(), has_box.tolist(),
+            columns['zone_mask'].tolist(), columns['track_id'].tolist(),
+            columns['label'].tolist(), columns['timestamp'].tolist()
+        )
+    ]
+
+
+class DetectionWriter:
+    """Write-behind buffer for detection events
+
+    ``add`` only appends to an in-memory buffer.  A background thread
+    flushes the buffer through the pool's writer with ``executemany`` in
+    a single transaction whenever it reaches ``batch_size`` rows or every
+    ``flush_interval`` seconds, whichever comes first.  The buffer holds
+    at most ``max_buffered`` events; beyond that the oldest are dropped
+    and counted in ``dropped``.  A batch whose write fails is kept and
+    retried on the next flush, up to ``max_retries`` times, before it is
+    given up and counted in ``failed``.
+    """
+
+    def __init__(self, pool, batch_size=500, flush_interval=1.0,
+                 max_buffered=50000, max_retries=3):
+        self.pool = pool
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffered = max_buffered
+        self.max_retries = max_retries
+        self._buffer = deque()
+        self._cond = threading.Condition()
+        self._running = True
+        self._retry_rows = []
+        self._attempts = 0
+        self.rows_written = 0
+        self.flushes = 0
+        self.dropped = 0
+        self.failed = 0
+        self._thread = threading.Thread(target=self._run, name='detection-writer', daemon=True)
+        self._thread.start()
+
+    def add(self, camera, detections):
+        if not detections:
+            return
+        with self._cond:
+            self._buffer.extend((camera, det) for det in detections)
+            overflow = len(self._buffer) + len(self._retry_rows) - self.max_buffered
+            if overflow > 0:
+                overflow = min(overflow, len(self._buffer))
+                for _ in range(overflow):
+                    self._buffer.popleft()
+                self.dropped += overflow
+                print(f"Error buffering detections: buffer full, dropped {overflow} oldest events")
+            if len(self._buffer) >= self.batch_size:
+                self._cond.notify()
+
+    def _take(self):
+        with self._cond:
+            if self._running and len(self._buffer) < self.batch_size:
+                self._cond.wait(self.flush_interval)
+            batch = list(self._buffer)
+            self._buffer.clear()
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take()
+            if batch or self._retry_rows:
+                self._write(batch)
+            elif not self._running:
+                break
+
+    def _write(self, batch):
+        rows, self._retry_rows = self._retry_rows, []
+        by_camera = {}
+        for camera, det in batch:
+            by_camera.setdefault(camera, []).append(det)
+        for camera, detections in by_camera.items():
+            try:
+                rows.extend(detection_rows(camera, detections))
+            except ValueError:
+                # Convert one by one so only the bad records are lost
+                for det in detections:
+                    try:
+                        rows.extend(detection_rows(camera, [det]))
+                    except ValueError as e:
+                        print(f"Error converting detection for {camera}: {str(e)}")
+                        self.failed += 1
+        if not rows:
+            return
+        try:
+            with self.pool.writer() as conn:
+                conn.executemany(INSERT_DETECTION, rows)
+            self.rows_written += len(rows)
+            self.flushes += 1
+            self._attempts = 0
+        except sqlite3.Error as e:
+            self._attempts += 1
+            if self._attempts <= self.max_retries:
+                print(f"Error writing {len(rows)} detections (attempt {self._attempts} of "
+                      f"{self.max_retries + 1}), retrying: {str(e)}")
+                with self._cond:
+                    self._retry_rows = rows
+            else:
+                print(f"Error writing {len(rows)} detections, giving up after "
+                      f"{self._attempts} attempts: {str(e)}")
+                self.failed += len(rows)
+                self._attempts = 0
+
+    def close(self, timeout=5.0):
+        """Flush anything buffered and stop the writer thread"""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        self._thread.join(timeout)
@@ -0,0 +1,190 @@
+import time
+from datetime import datetime
+from enum import IntEnum
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+# Offset that turns time.monotonic_ns() readings into wall-clock epoch ns
+_WALL_OFFSET_NS = time.time_ns() - time.monotonic_ns()
+
+# Zones are stored as bits of a signed 64-bit mask (the detections table's
+# zone_mask INTEGER column), so zone ids must stay below this
+MAX_ZONES = 63
+
+
+class DetectionClass(IntEnum):
+    MOTION = 0
+    VEHICLE = 1
+    PERSON = 2
+    OTHER = 3
+    PLATE = 4
+    HAND = 5
+
+    @classmethod
+    def from_name(cls, name: str) -> 'DetectionClass':
+        try:
+            return cls[name.upper()]
+        except (KeyError, AttributeError):
+            return cls.OTHER
+
+    @property
+    def label(self) -> str:
+        return self.name.lower()
+
+
+def monotonic_to_epoch(timestamp_ns: int) -> float:
+    """Convert a monotonic ns timestamp to epoch seconds"""
+    return (timestamp_ns + _WALL_OFFSET_NS) / 1e9
+
+
+class Detection:
+    """A single detection shared by all detectors
+
+    Supports ``det['class']`` style access for code written against the
+    old detection dicts; ``timestamp`` is only formatted when asked for.
+    """
+
+    __slots__ = ('class_id', 'confidence', 'bbox', 'timestamp_ns',
+                 'zones', 'label', 'track_id')
+
+    def __init__(self, class_id: DetectionClass, confidence: float = 1.0,
+                 bbox: Optional[Sequence[int]] = None, zones: Sequence[int] = (),
+                 label: Optional[str] = None, track_id: int = -1,
+                 timestamp_ns: Optional[int] = None):
+        self.class_id = DetectionClass(class_id)
+        self.confidence = float(confidence)
+        self.bbox = None if bbox is None else np.asarray(bbox, dtype=np.int32)
+        self.zones = tuple(zones)
+        self.label = label
+        self.track_id = track_id
+        self.timestamp_ns = time.monotonic_ns() if timestamp_ns is None else timestamp_ns
+
+    @property
+    def class_name(self) -> str:
+        return self.class_id.label
+
+    @property
+    def epoch(self) -> float:
+        return monotonic_to_epoch(self.timestamp_ns)
+
+    def __getitem__(self, key):
+        if key == 'class':
+            return self.class_name
+        if key == 'confidence':
+            return self.confidence
+        if key == 'zones':
+            return list(self.zones)
+        if key == 'bbox':
+            return None if self.bbox is None else self.bbox.tolist()
+        if key == 'timestamp':
+            return datetime.fromtimestamp(self.epoch).isoformat()
+        if key == 'label' and self.label is not None:
+            return self.label
+        if key == 'track_id' and self.track_id >= 0:
+            return self.track_id
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self) -> Dict:
+        result = {
+            'class': self.class_name,
+            'confidence': self.confidence,
+            'timestamp': self['timestamp']
+        }
+        if self.bbox is not None:
+            result['bbox'] = self.bbox.tolist()
+        if self.zones:
+            result['zones'] = list(self.zones)
+        if self.label is not None:
+            result['label'] = self.label
+        if self.track_id >= 0:
+            result['track_id'] = self.track_id
+        return result
+
+    def __repr__(self):
+        return (f"Detection({self.class_name}, confidence={self.confidence:.2f}, "
+                f"bbox={None if self.bbox is None else self.bbox.tolist()})")
+
+
+class DetectionBatch:
+    """Struct-of-arrays form of many detections for bulk export and storage
+
+    Missing bboxes are stored as -1 rows and missing track ids as -1.
+    Zones are kept as a bitmask so the batch stays fully columnar.
+    """
+
+    def __init__(self, class_id, confidence, bbox, timestamp_ns, track_id,
+                 zone_mask, labels):
+        self.class_id = class_id
+        self.confidence = confidence
+        self.bbox = bbox
+        self.timestamp_ns = timestamp_ns
+        self.track_id = track_id
+        self.zone_mask = zone_mask
+        self.labels = labels
+
+    @classmethod
+    def from_detections(cls, detections: Iterable[Detection]) -> 'DetectionBatch':
+        detections = list(detections)
+        n = len(detections)
+        bbox = np.full((n, 4), -1, dtype=np.int32)
+        zone_mask = np.zeros(n, dtype=np.int64)
+        for i, det in enumerate(detections):
+            if det.bbox is not None:
+                bbox[i] = det.bbox
+            for zone in det.zones:
+                if not 0 <= zone < MAX_ZONES:
+                    raise ValueError(f"Zone {zone} does not fit the {MAX_ZONES}-zone mask")
+                zone_mask[i] |= 1 << int(zone)
+        return cls(
+            class_id=np.fromiter((d.class_id for d in detections), dtype=np.int8, count=n),
+            confidence=np.fromiter((d.confidence for d in detections), dtype=np.float32, count=n),
+            bbox=bbox,
+            timestamp_ns=np.fromiter((d.timestamp_ns for d in detections), dtype=np.int64, count=n),
+            track_id=np.fromiter((d.track_id for d in detections), dtype=np.int64, count=n),
+            zone_mask=zone_mask,
+            labels=[d.label for d in detections]
+        )
+
+    def __len__(self):
+        return len(self.class_id)
+
+    def epoch_seconds(self) -> np.ndarray:
+        return (self.timestamp_ns + _WALL_OFFSET_NS) / 1e9
+
+    def to_detections(self) -> List[Detection]:
+        detections = []
+        for i in range(len(self)):
+            mask = int(self.zone_mask[i])
+            zones = [z for z in range(mask.bit_length()) if mask >> z & 1]
+            detections.append(Detection(
+                DetectionClass(int(self.class_id[i])),
+                float(self.confidence[i]),
+                None if self.bbox[i, 0] < 0 else self.bbox[i],
+                zones,
+                self.labels[i],
+                int(self.track_id[i]),
+                int(self.timestamp_ns[i])
+            ))
+        return detections
+
+    def to_columns(self) -> Dict[str, np.ndarray]:
+        """Column dict suitable for a DataFrame or executemany export"""
+        return {
+            'class': np.array([c.label for c in map(DetectionClass, self.class_id.tolist())]),
+            'confidence': self.confidence,
+            'x1': self.bbox[:, 0],
+            'y1': self.bbox[:, 1],
+            'x2': self.bbox[:, 2],
+            'y2': self.bbox[:, 3],
+            'timestamp': self.epoch_seconds(),
+            'track_id': self.track_id,
+            'zone_mask': self.zone_mask,
+            'label': np.array(self.labels, dtype=object)
+        }
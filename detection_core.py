@@ -0,0 +1,84 @@
+from PIL import Image
+from motion_engine import MotionEngine
+from detection import Detection, DetectionClass
+from detection_history import DetectionHistory
+
+
+class SecuritySystem:
+    def __init__(self, zone_grid=(3, 3), downscale=1):
+        self.initialized = True
+        self.motion_engine = MotionEngine(zone_grid, downscale)
+        self.prev_frame = None
+        self.motion_threshold = 25
+        self.min_motion_area = 500
+        self.max_history = 1000
+        self.detection_history = DetectionHistory(self.max_history)
+        # Optional DetectionWriter for persisting events
+        self.camera_id = 'default'
+        self.event_writer = None
+
+    def set_sensitivity(self, sensitivity: int):
+        """Adjust motion detection sensitivity (0-100)"""
+        self.motion_threshold = int(50 - (sensitivity * 0.4))
+        self.min_motion_area = int(1000 - (sensitivity * 8))
+
+    def detect_changes(self, current_frame):
+        """Motion detection over the zone grid using the motion engine"""
+        if current_frame is None:
+            return False, None, []
+
+        gray_np = self.motion_engine.prepare(current_frame)
+
+        if self.prev_frame is None or self.prev_frame.shape != gray_np.shape:
+            self.prev_frame = gray_np
+            return False, current_frame, []
+
+        motion_detected, zones = self.motion_engine.detect(
+            self.prev_frame, gray_np, self.motion_threshold
+        )
+
+        # Update previous frame
+        self.prev_frame = gray_np
+
+        return motion_detected, current_frame, zones
+
+    def process_frame(self, frame):
+        """Process frame for basic detection"""
+        try:
+            if not self.initialized or frame is None:
+                return [], frame
+
+            # Convert to PIL Image if needed
+            if not isinstance(frame, Image.Image):
+                frame = Image.fromarray(frame)
+
+            # Perform motion detection
+            motion_detected, processed_frame, zones = self.detect_changes(frame)
+
+            detections = []
+            if motion_detected:
+                detection = Detection(DetectionClass.MOTION, 1.0, zones=zones)
+                detections.append(detection)
+
+                # Update detection history
+                self.detection_history.append(detection.class_id, detection.epoch)
+                if self.event_writer is not None:
+                    self.event_writer.add(self.camera_id, detections)
+
+            return detections, processed_frame
+
+        except Exception as e:
+            print(f"Error processing frame: {str(e)}")
+            return [], frame
+
+    def get_statistics(self):
+        """Get basic statistics"""
+        stats = self.detection_history.statistics()
+        if not stats:
+            return {}
+
+        return {
+            'total_detections': stats['total_detections'],
+            'motion_events': stats['motion_events'],
+            'last_detection': stats['last_detection']
+        }
@@ -0,0 +1,95 @@
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+from detection import Detection, DetectionClass
+
+
+class DetectionHistory:
+    """Fixed-capacity ring buffer of detections with running statistics
+
+    Each entry is an epoch-seconds timestamp, a class code and its local
+    hour.  Per-class counts and the 24-hour histogram are updated as
+    entries are appended and evicted, so ``statistics`` is O(1) no matter
+    how full the buffer is.
+    """
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = max(1, int(capacity))
+        self.timestamps = np.zeros(self.capacity, dtype=np.int64)
+        self.classes = np.zeros(self.capacity, dtype=np.int8)
+        self.hours = np.zeros(self.capacity, dtype=np.int8)
+        self.class_counts = np.zeros(len(DetectionClass), dtype=np.int64)
+        self.hourly = np.zeros(24, dtype=np.int64)
+        self.head = 0
+        self.size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.size
+
+    def append(self, class_name, timestamp: Optional[float] = None):
+        """Record one detection; evicts the oldest entry when full"""
+        if isinstance(class_name, DetectionClass):
+            code = int(class_name)
+        else:
+            code = int(DetectionClass.from_name(class_name))
+        ts = int(time.time() if timestamp is None else timestamp)
+        hour = time.localtime(ts).tm_hour
+
+        with self._lock:
+            if self.size == self.capacity:
+                self.class_counts[self.classes[self.head]] -= 1
+                self.hourly[self.hours[self.head]] -= 1
+            else:
+                self.size += 1
+
+            self.timestamps[self.head] = ts
+            self.classes[self.head] = code
+            self.hours[self.head] = hour
+            self.class_counts[code] += 1
+            self.hourly[hour] += 1
+            self.head = (self.head + 1) % self.capacity
+
+    def extend(self, detections: Iterable):
+        """Record Detection objects (or legacy detection dicts)"""
+        now = time.time()
+        for det in detections:
+            if isinstance(det, Detection):
+                self.append(det.class_id, det.epoch)
+            else:
+                self.append(det.get('class', 'other'), now)
+
+    def count(self, class_name: str) -> int:
+        return int(self.class_counts[DetectionClass.from_name(class_name)])
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        if not self.size:
+            return None
+        return int(self.timestamps[(self.head - 1) % self.capacity])
+
+    def statistics(self) -> Dict:
+        """Counts per class and hourly activity over the buffered entries"""
+        with self._lock:
+            if not self.size:
+                return {}
+            last = self.last_timestamp
+            return {
+                'total_detections': self.size,
+                'vehicle_count': int(self.class_counts[DetectionClass.VEHICLE]),
+                'person_count': int(self.class_counts[DetectionClass.PERSON]),
+                'motion_events': int(self.class_counts[DetectionClass.MOTION]),
+                'hourly_activity': self.hourly.tolist(),
+                'last_detection': datetime.fromtimestamp(last).isoformat()
+            }
+
+    def clear(self):
+        with self._lock:
+            self.class_counts[:] = 0
+            self.hourly[:] = 0
+            self.head = 0
+            self.size = 0
@@ -1,31 +1,101 @@
-import os
 import cv2
 import numpy as np
 from PIL import Image
-import io
-import base64
-from datetime import datetime
-import requests
+import time
+from cascade_backend import SerialCascadeBackend
+from detection import Detection, DetectionClass
+from detection_history import DetectionHistory
+from motion_backends import FrameDiffBackend, create_motion_backend
+
+# Drawing colour and confidence reported for each cascade's detections
+CASCADE_STYLES = {
+    'vehicle': ((0, 255, 0), 0.85),
+    'person': ((255, 0, 0), 0.9),
+}
+CASCADE_CLASSES = {
+    'vehicle': DetectionClass.VEHICLE,
+    'person': DetectionClass.PERSON,
+}
+
+
+def merge_regions(boxes, padding, frame_shape):
+    """Pad (x, y, w, h) boxes and merge overlapping ones into crop regions
+
+    Returns non-overlapping (x1, y1, x2, y2) regions clipped to the frame.
+    """
+    frame_h, frame_w = frame_shape[:2]
+    regions = [
+        [max(0, x - padding), max(0, y - padding),
+         min(frame_w, x + w + padding), min(frame_h, y + h + padding)]
+        for (x, y, w, h) in boxes
+    ]
+
+    merged = True
+    while merged:
+        merged = False
+        result = []
+        for region in regions:
+            for other in result:
+                if (region[0] < other[2] and other[0] < region[2] and
+                        region[1] < other[3] and other[1] < region[3]):
+                    other[0] = min(other[0], region[0])
+                    other[1] = min(other[1], region[1])
+                    other[2] = max(other[2], region[2])
+                    other[3] = max(other[3], region[3])
+                    merged = True
+                    break
+            else:
+                result.append(region)
+        regions = result
+
+    return [tuple(region) for region in regions]
+
 
 class DetectionService:
-    def __init__(self):
+    def __init__(self, backend=None):
         try:
-            # Initialize cascade classifiers
-            self.car_cascade = cv2.CascadeClassifier(
-                cv2.data.haarcascades + 'haarcascade_car.xml'
-            )
-            self.face_cascade = cv2.CascadeClassifier(
-                cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-            )
+            # Cascade detection backend (serial or process pool)
+            self.backend = backend or SerialCascadeBackend()
 
-            # Motion detection parameters
-            self.prev_frame = None
+            # Motion detection parameters; the backend holds the
+            # reference (previous frame or learned background)
+            self.motion_backend = FrameDiffBackend()
             self.motion_threshold = 25
             self.min_motion_area = 500
-
-            # Detection history
-            self.detection_history = []
+            self.motion_boxes = []
+
+            # Region-of-interest mode: run cascades only around motion and
+            # rescan the full frame every full_scan_interval frames,
+            # starting with the first one
+            self.roi_mode = False
+            self.roi_padding = 32
+            self.full_scan_interval = 30
+            self.frames_since_full_scan = self.full_scan_interval
+
+            # Multi-resolution mode: motion runs on a small proxy frame and
+            # cascades at cascade_scale; both are tuned toward
+            # frame_budget_ms when a budget is set.  Scales only step when
+            # the smoothed frame time leaves the band between
+            # (1 - resolution_band) * budget and the budget, and at most
+            # once per resolution_cooldown frames so the average catches up
+            self.multi_resolution = False
+            self.motion_scale = 0.25
+            self.cascade_scale = 0.5
+            self.frame_budget_ms = None
+            self.frame_time_ms = 0.0
+            self.resolution_band = 0.4
+            self.resolution_cooldown = 10
+            self.frames_since_resize = 0
+
+            # Alerts go through an AlertDispatcher; the registry's shared
+            # one is used unless another is attached
+            self.alert_dispatcher = None
+
+            # Detection history, optionally persisted via a DetectionWriter
+            self.camera_id = 'default'
+            self.event_writer = None
             self.max_history = 1000
+            self.detection_history = DetectionHistory(self.max_history)
 
             self.initialized = True
 
@@ -38,18 +108,37 @@ class DetectionService:
         self.motion_threshold = int(50 - (sensitivity * 0.4))
         self.min_motion_area = int(1000 - (sensitivity * 8))
 
-    def detect_motion(self, frame):
+    def set_motion_backend(self, backend='frame_diff', **options):
+        """Use a MotionBackend instance, or one built by name
+        (frame_diff, running_average, mog2, knn)"""
+        if isinstance(backend, str):
+            backend = create_motion_backend(backend, **options)
+        self.motion_backend = backend
+        return backend
+
+    def detect_motion(self, frame, gray=None):
         """Enhanced motion detection with zone analysis"""
         try:
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            gray = cv2.GaussianBlur(gray, (21, 21), 0)
-
-            if self.prev_frame is None:
-                self.prev_frame = gray
+            if gray is None:
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+            scale = self.motion_scale if self.multi_resolution else 1.0
+            if scale < 1.0:
+                gray = cv2.resize(gray, None, fx=scale, fy=scale,
+                                  interpolation=cv2.INTER_AREA)
+                # Keep the blur and minimum area the same in full-res pixels
+                kernel = max(3, int(21 * scale) | 1)
+                gray = cv2.GaussianBlur(gray, (kernel, kernel), 0)
+            else:
+                gray = cv2.GaussianBlur(gray, (21, 21), 0)
+            min_area = self.min_motion_area * scale * scale
+
+            self.motion_boxes = []
+
+            self.motion_backend.threshold = self.motion_threshold
+            thresh = self.motion_backend.mask(gray)
+            if thresh is None:
                 return False, frame, []
-
-            frame_delta = cv2.absdiff(self.prev_frame, gray)
-            thresh = cv2.threshold(frame_delta, self.motion_threshold, 255, cv2.THRESH_BINARY)[1]
             thresh = cv2.dilate(thresh, None, iterations=2)
 
             contours, _ = cv2.findContours(
@@ -62,11 +151,15 @@ class DetectionService:
             motion_zones = []
 
             for contour in contours:
-                if cv2.contourArea(contour) < self.min_motion_area:
+                if cv2.contourArea(contour) < min_area:
                     continue
 
                 motion_detected = True
                 (x, y, w, h) = cv2.boundingRect(contour)
+                if scale < 1.0:
+                    x, y = int(x / scale), int(y / scale)
+                    w, h = int(np.ceil(w / scale)), int(np.ceil(h / scale))
+                self.motion_boxes.append((x, y, w, h))
                 cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
 
                 # Calculate motion zone
@@ -80,7 +173,6 @@ class DetectionService:
                 zone_id = zone_y * 3 + zone_x
                 motion_zones.append(zone_id)
 
-            self.prev_frame = gray
             return motion_detected, frame, motion_zones
         except Exception as e:
             print(f"Error in motion detection: {str(e)}")
@@ -92,129 +184,129 @@ class DetectionService:
             if not self.initialized:
                 return [], image
 
+            started = time.perf_counter()
             img = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
             detections = []
 
             # Motion detection
-            motion_detected, img, motion_zones = self.detect_motion(img)
+            motion_detected, img, motion_zones = self.detect_motion(img, gray)
             if motion_detected:
-                detections.append({
-                    'class': 'motion',
-                    'confidence': 1.0,
-                    'zones': motion_zones,
-                    'timestamp': datetime.now().isoformat()
-                })
-
-            # Vehicle detection
-            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-            vehicles = self.car_cascade.detectMultiScale(
-                gray,
-                scaleFactor=1.1,
-                minNeighbors=5,
-                minSize=(30, 30)
-            )
-
-            for (x, y, w, h) in vehicles:
-                cv2.rectangle(img, (x, y), (x+w, y+h), (0, 255, 0), 2)
-                detections.append({
-                    'class': 'vehicle',
-                    'confidence': 0.85,
-                    'bbox': [x, y, x+w, y+h],
-                    'timestamp': datetime.now().isoformat()
-                })
-
-            # Person detection
-            faces = self.face_cascade.detectMultiScale(
-                gray,
-                scaleFactor=1.1,
-                minNeighbors=5,
-                minSize=(30, 30)
-            )
-
-            for (x, y, w, h) in faces:
-                cv2.rectangle(img, (x, y), (x+w, y+h), (255, 0, 0), 2)
-                detections.append({
-                    'class': 'person',
-                    'confidence': 0.9,
-                    'bbox': [x, y, x+w, y+h],
-                    'timestamp': datetime.now().isoformat()
-                })
+                detections.append(Detection(DetectionClass.MOTION, 1.0, zones=motion_zones))
+
+            # Cascade detection (vehicles, people, ...)
+            for label, boxes in self.detect_objects(gray).items():
+                color, confidence = CASCADE_STYLES.get(label, ((0, 255, 255), 0.8))
+                class_id = CASCADE_CLASSES.get(label, DetectionClass.OTHER)
+                timestamp_ns = time.monotonic_ns()
+                for (x, y, w, h) in boxes.tolist():
+                    cv2.rectangle(img, (x, y), (x+w, y+h), color, 2)
+                    detections.append(Detection(
+                        class_id, confidence, (x, y, x+w, y+h),
+                        label=None if class_id != DetectionClass.OTHER else label,
+                        timestamp_ns=timestamp_ns
+                    ))
 
             # Convert back to PIL Image for display
             img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
             result_image = Image.fromarray(img_rgb)
 
+            self.tune_resolution((time.perf_counter() - started) * 1000)
             return detections, result_image
 
         except Exception as e:
             print(f"Error processing image: {str(e)}")
             return [], image
 
+    def detect_objects(self, gray):
+        """Run the cascades and return boxes in full-resolution coordinates"""
+        scale = self.cascade_scale if self.multi_resolution else 1.0
+        if scale < 1.0:
+            gray = cv2.resize(gray, None, fx=scale, fy=scale,
+                              interpolation=cv2.INTER_AREA)
+
+        results = self.detect_regions(gray, scale)
+        if scale < 1.0:
+            results = {
+                label: np.round(boxes / scale).astype(np.int32)
+                for label, boxes in results.items()
+            }
+        return results
+
+    def detect_regions(self, gray, scale=1.0):
+        """Run the cascades on the full frame or only on motion regions"""
+        if not self.roi_mode:
+            return self.backend.detect(gray, scale)
+
+        self.frames_since_full_scan += 1
+        if self.frames_since_full_scan >= self.full_scan_interval:
+            self.frames_since_full_scan = 0
+            return self.backend.detect(gray, scale)
+
+        motion_boxes = [
+            (int(x * scale), int(y * scale), int(np.ceil(w * scale)), int(np.ceil(h * scale)))
+            for (x, y, w, h) in self.motion_boxes
+        ]
+        results = {}
+        # roi_padding is in full-resolution pixels
+        padding = int(round(self.roi_padding * scale))
+        for (x1, y1, x2, y2) in merge_regions(motion_boxes, padding, gray.shape):
+            crop_results = self.backend.detect(gray[y1:y2, x1:x2], scale)
+            for label, boxes in crop_results.items():
+                boxes = boxes + np.array([x1, y1, 0, 0], dtype=boxes.dtype)
+                results[label] = np.vstack([results[label], boxes]) if label in results else boxes
+        return results
+
+    def tune_resolution(self, elapsed_ms):
+        """Step the processing scales toward the frame-time budget"""
+        self.frame_time_ms = 0.8 * self.frame_time_ms + 0.2 * elapsed_ms
+        if not self.multi_resolution or not self.frame_budget_ms:
+            return
+
+        self.frames_since_resize += 1
+        if self.frames_since_resize < self.resolution_cooldown:
+            return
+
+        scales = (self.cascade_scale, self.motion_scale)
+        if self.frame_time_ms > self.frame_budget_ms:
+            # Over budget: shrink the cascade frame first, it dominates cost
+            if self.cascade_scale > 0.25:
+                self.cascade_scale = max(0.25, round(self.cascade_scale - 0.05, 2))
+            elif self.motion_scale > 0.125:
+                self.motion_scale = max(0.125, round(self.motion_scale - 0.025, 3))
+        elif self.frame_time_ms < (1 - self.resolution_band) * self.frame_budget_ms:
+            if self.motion_scale < 0.5:
+                self.motion_scale = min(0.5, round(self.motion_scale + 0.025, 3))
+            elif self.cascade_scale < 1.0:
+                self.cascade_scale = min(1.0, round(self.cascade_scale + 0.05, 2))
+        if (self.cascade_scale, self.motion_scale) != scales:
+            self.frames_since_resize = 0
+
     def update_detection_history(self, detections):
         """Update detection history with new detections"""
         self.detection_history.extend(detections)
-        if len(self.detection_history) > self.max_history:
-            self.detection_history = self.detection_history[-self.max_history:]
+        if self.event_writer is not None:
+            self.event_writer.add(self.camera_id, detections)
 
     def get_detection_statistics(self):
         """Get statistics from detection history"""
-        if not self.detection_history:
-            return {}
-
-        stats = {
-            'total_detections': len(self.detection_history),
-            'vehicle_count': 0,
-            'person_count': 0,
-            'motion_events': 0,
-            'hourly_activity': [0] * 24
-        }
-
-        for det in self.detection_history:
-            hour = datetime.fromisoformat(det['timestamp']).hour
-            stats['hourly_activity'][hour] += 1
-
-            if det['class'] == 'vehicle':
-                stats['vehicle_count'] += 1
-            elif det['class'] == 'person':
-                stats['person_count'] += 1
-            elif det['class'] == 'motion':
-                stats['motion_events'] += 1
-
-        return stats
-
-    def send_alert(self, image, detections, emailjs_user_id, template_id, service_id):
-        """Send alert notification"""
-        try:
-            buffered = io.BytesIO()
-            image.save(buffered, format="PNG")
-            img_str = base64.b64encode(buffered.getvalue()).decode()
-
-            detection_text = []
-            for det in detections:
-                if det['class'] == 'vehicle':
-                    text = f"Vehicle detected - Confidence: {det['confidence']:.2%}"
-                    detection_text.append(text)
-                elif det['class'] == 'person':
-                    detection_text.append(f"Person detected - Confidence: {det['confidence']:.2%}")
-                elif det['class'] == 'motion':
-                    detection_text.append(f"Motion detected in zones: {det.get('zones', [])}")
-
-            payload = {
-                "service_id": service_id,
-                "template_id": template_id,
-                "user_id": emailjs_user_id,
-                "template_params": {
-                    "detection_results": "\n".join(detection_text),
-                    "image": f"data:image/png;base64,{img_str}",
-                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                }
-            }
+        return self.detection_history.statistics()
 
-            response = requests.post(
-                "https://api.emailjs.com/api/v1.0/email/send",
-                json=payload
+    def send_alert(self, image, detections, emailjs_user_id, template_id, service_id,
+                   camera=None):
+        """Queue an alert notification
+
+        Sending happens on the dispatcher's worker thread, so this never
+        blocks on the network.  Returns False if the alert was dropped.
+        """
+        try:
+            if self.alert_dispatcher is None:
+                from resources import registry
+                self.alert_dispatcher = registry.get('alert_dispatcher')
+            return self.alert_dispatcher.submit(
+                camera if camera is not None else self.camera_id, image, detections,
+                service_id=service_id, template_id=template_id, user_id=emailjs_user_id
             )
-            return response.status_code == 200
         except Exception as e:
             print(f"Error sending alert: {str(e)}")
-            return False
\ No newline at end of file
+            return False
@@ -7,107 +7,12 @@ import numpy as np
 import os
 import threading
 import pyttsx3
+from video_pipeline import VideoPipeline
+from detection_core import SecuritySystem
+from detection import Detection, DetectionClass
 from datetime import datetime
 import csv
-import pandas as pd
-import streamlit as st # Added for Streamlit integration (if needed)
-import io # Added for Streamlit integration (if needed)
-
-
-class SecuritySystem:
-    def __init__(self):
-        self.initialized = True
-        self.prev_frame = None
-        self.motion_threshold = 25
-        self.min_motion_area = 500
-        self.detection_history = []
-        self.max_history = 1000
-
-    def set_sensitivity(self, sensitivity: int):
-        """Adjust motion detection sensitivity (0-100)"""
-        self.motion_threshold = int(50 - (sensitivity * 0.4))
-        self.min_motion_area = int(1000 - (sensitivity * 8))
-
-    def detect_changes(self, current_frame):
-        """Basic motion detection using PIL and numpy"""
-        if current_frame is None:
-            return False, None, []
-
-        # Convert PIL image to grayscale numpy array
-        gray = current_frame.convert('L')
-        gray_np = np.array(gray)
-
-        if self.prev_frame is None:
-            self.prev_frame = gray_np
-            return False, current_frame, []
-
-        # Calculate absolute difference
-        frame_delta = np.abs(gray_np - self.prev_frame)
-        motion_detected = np.mean(frame_delta) > self.motion_threshold
-
-        # Update previous frame
-        self.prev_frame = gray_np
-
-        if motion_detected:
-            # Simple zone detection (divide image into 9 zones)
-            h, w = gray_np.shape
-            zones = []
-            for i in range(3):
-                for j in range(3):
-                    zone = frame_delta[i*h//3:(i+1)*h//3, j*w//3:(j+1)*w//3]
-                    if np.mean(zone) > self.motion_threshold:
-                        zones.append(i * 3 + j)
-            return True, current_frame, zones
-
-        return False, current_frame, []
-
-    def process_frame(self, frame):
-        """Process frame for basic detection"""
-        try:
-            if not self.initialized or frame is None:
-                return [], frame
-
-            # Convert to PIL Image if needed
-            if not isinstance(frame, Image.Image):
-                frame = Image.fromarray(frame)
-
-            # Perform motion detection
-            motion_detected, processed_frame, zones = self.detect_changes(frame)
-
-            detections = []
-            if motion_detected:
-                detections.append({
-                    'class': 'motion',
-                    'confidence': 1.0,
-                    'zones': zones,
-                    'timestamp': datetime.now().isoformat()
-                })
-
-                # Update detection history
-                self.detection_history.append({
-                    'type': 'motion',
-                    'zones': zones,
-                    'timestamp': datetime.now().isoformat()
-                })
-                if len(self.detection_history) > self.max_history:
-                    self.detection_history = self.detection_history[-self.max_history:]
-
-            return detections, processed_frame
-
-        except Exception as e:
-            print(f"Error processing frame: {str(e)}")
-            return [], frame
-
-    def get_statistics(self):
-        """Get basic statistics"""
-        if not self.detection_history:
-            return {}
 
-        return {
-            'total_detections': len(self.detection_history),
-            'motion_events': len([d for d in self.detection_history if d['type'] == 'motion']),
-            'last_detection': self.detection_history[-1]['timestamp'] if self.detection_history else None
-        }
 
 class YOLOv5App:
     def __init__(self, root):
@@ -126,6 +31,15 @@ class YOLOv5App:
         self.detection_mode = tk.StringVar(value="all")  
         self.paused = False
 
+        # Video pipeline settings
+        self.decode_queue_depth = 4
+        self.pipeline_workers = 2
+        self.render_interval_ms = 15
+        self.pipeline = None
+        # Created on first use of the "hands" mode (loads mediapipe)
+        self.hand_detector = None
+        self.gesture_every = 2
+
         # Initialize GUI components
         self.create_widgets()
 
@@ -291,7 +205,7 @@ class YOLOv5App:
         if self.image_path:
             self.detect_image(self.image_path, current_mode)
         elif self.cap:
-            threading.Thread(target=lambda: self.detect_video(current_mode)).start()
+            self.detect_video(current_mode)
         else:
             messagebox.showwarning("No File Selected", 
                                  "Please upload an image or video before starting detection.")
@@ -354,36 +268,106 @@ class YOLOv5App:
         if self.cap is None:
             return
 
-        while self.cap.isOpened():
-            if self.paused:
-                self.root.update()
-                continue
-
-            ret, frame = self.cap.read()
-            if not ret:
-                break
+        if self.pipeline is not None:
+            self.pipeline.stop()
 
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            frame = Image.fromarray(frame)
+        if mode == "hands" and self.hand_detector is None:
+            from hand_detection import HandDetector
+            self.hand_detector = HandDetector(every=self.gesture_every)
 
-            detections, processed_frame = self.security_system.process_frame(frame)
+        if mode == "hands":
+            stages = dict(process=self.process_hand_frame, finish=self.finish_hand_frame)
+        else:
+            stages = dict(prepare=self.prepare_video_frame, process=self.process_video_frame,
+                          finish=self.finish_video_frame)
+        self.pipeline = VideoPipeline(
+            self.cap,
+            decode_depth=self.decode_queue_depth,
+            workers=self.pipeline_workers,
+            events=self.frame_detections,
+            **stages
+        ).start()
+        self.root.after(self.render_interval_ms, self.render_video)
+
+    def prepare_video_frame(self, frame):
+        """Pipeline worker: BGR array to RGB image"""
+        return Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+
+    def process_video_frame(self, frame, seq):
+        """Pipeline detect thread: motion detection sees frames one at a time, in order"""
+        return self.security_system.process_frame(frame)
+
+    @staticmethod
+    def frame_detections(result):
+        """Pipeline detect thread: every frame's detections are logged, in order"""
+        return result[0]
+
+    def finish_video_frame(self, result):
+        """Pipeline worker: scale the annotated frame for display"""
+        _, processed_frame = result
+        return processed_frame.resize((800, 600), Image.LANCZOS)
+
+    def process_hand_frame(self, frame, seq):
+        """Pipeline detect thread for the "hands" mode; gesture start events become detections"""
+        frame, gestures, events = self.hand_detector.track_gestures(frame, seq)
+        detections = [
+            Detection(DetectionClass.HAND, label=event['gesture'], track_id=event['hand'])
+            for event in events if event['type'] == 'start'
+        ]
+        return detections, frame
+
+    def finish_hand_frame(self, result):
+        """Pipeline worker: BGR array to a display-sized RGB image"""
+        _, frame = result
+        processed_frame = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        return processed_frame.resize((800, 600), Image.LANCZOS)
+
+    def render_video(self):
+        """Log every frame's detections and draw the newest frame; runs on the Tk main loop"""
+        pipeline = self.pipeline
+        if pipeline is None:
+            return
 
-            for detection in detections:
+        # Every detection is logged; each distinct message is spoken once per tick
+        spoken_texts = []
+        for detection in pipeline.drain_events():
+            if detection['class'] == 'hand':
+                spoken = f"{detection['label']} gesture"
+                detection_text = f"[{datetime.now().strftime('%H:%M:%S')}] Hand {detection['track_id']}: {detection['label']}"
+            else:
+                spoken = "Motion detected"
                 detection_text = f"[{datetime.now().strftime('%H:%M:%S')}] Motion detected in zones: {detection['zones']}"
-                self.detections_list.insert(tk.END, detection_text)
-                self.detections_list.see(tk.END)  
-                threading.Thread(target=self.speak_detection, 
-                               args=(f"Motion detected",)).start()
-                self.export_results_list.append(detection_text)
-
-            processed_frame = processed_frame.resize((800, 600), Image.LANCZOS)
+            self.detections_list.insert(tk.END, detection_text)
+            self.detections_list.see(tk.END)
+            if spoken not in spoken_texts:
+                spoken_texts.append(spoken)
+            self.export_results_list.append(detection_text)
+        for spoken in spoken_texts:
+            threading.Thread(target=self.speak_detection,
+                           args=(spoken,)).start()
+
+        processed_frame = pipeline.latest_result()
+        if processed_frame is not None:
             processed_frame = ImageTk.PhotoImage(processed_frame)
-
             self.image_label.configure(image=processed_frame)
             self.image_label.image = processed_frame
-            self.root.update()
 
-        self.cap.release()
+        if pipeline.finished:
+            pipeline.stop()
+            self.pipeline = None
+            stats = pipeline.stats()
+            self.result_label.config(
+                text="Decoded {} | Detected {} | Rendered {} frames".format(
+                    stats['decode']['count'],
+                    stats['detect']['count'],
+                    stats['render']['count']
+                )
+            )
+            if self.cap is not None:
+                self.cap.release()
+            return
+
+        self.root.after(self.render_interval_ms, self.render_video)
 
     def save_result(self):
         if self.results_image:
@@ -464,7 +448,8 @@ class YOLOv5App:
                     
                     data.append(row)
 
-                # Create DataFrame
+                # Create DataFrame (pandas is only needed for exports)
+                import pandas as pd
                 df = pd.DataFrame(data)
 
                 # Get save file path
@@ -499,6 +484,10 @@ class YOLOv5App:
         """Reset the application state and clear all detections"""
         try:
             # Reset video capture if it exists
+            if self.pipeline is not None:
+                self.pipeline.stop()
+                self.pipeline = None
+
             if hasattr(self, 'cap') and self.cap is not None:
                 self.cap.release()
                 self.cap = None
@@ -538,9 +527,13 @@ class YOLOv5App:
 
     def pause_video(self):
         self.paused = True
+        if self.pipeline is not None:
+            self.pipeline.pause()
 
     def resume_video(self):
         self.paused = False
+        if self.pipeline is not None:
+            self.pipeline.resume()
 
     def handle_drop(self, event):
         self.image_path = event.data.strip('{}')  
@@ -552,6 +545,7 @@ class YOLOv5App:
 
 
 # Main application loop
-root = TkinterDnD.Tk()  
-app = YOLOv5App(root)
-root.mainloop()
\ No newline at end of file
+if __name__ == "__main__":
+    root = TkinterDnD.Tk()
+    app = YOLOv5App(root)
+    root.mainloop()
@@ -0,0 +1,96 @@
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+NUM_LANDMARKS = 21
+FINGERS = ('thumb', 'index', 'middle', 'ring', 'pinky')
+
+# Landmark indices per finger (thumb, index, middle, ring, pinky)
+TIPS = np.array([4, 8, 12, 16, 20])
+MIDS = np.array([3, 7, 11, 15, 19])
+BASES = np.array([2, 6, 10, 14, 18])
+
+# Bit i of a finger code is set when FINGERS[i] is extended
+FINGER_BITS = (1 << np.arange(len(FINGERS))).astype(np.uint8)
+
+GESTURES = ('OPEN_HAND', 'CLOSED_FIST', 'POINTING', 'PEACE', 'CALL',
+            'THUMBS_UP', 'FOUR_FINGERS', 'UNKNOWN')
+NO_HAND = -1
+
+
+def _gesture_for_code(code: int) -> str:
+    extended = {finger for i, finger in enumerate(FINGERS) if code >> i & 1}
+    if len(extended) == len(FINGERS):
+        return 'OPEN_HAND'
+    if not extended:
+        return 'CLOSED_FIST'
+    patterns = {
+        frozenset({'index'}): 'POINTING',
+        frozenset({'index', 'middle'}): 'PEACE',
+        frozenset({'thumb', 'pinky'}): 'CALL',
+        frozenset({'thumb'}): 'THUMBS_UP',
+        frozenset({'index', 'middle', 'ring', 'pinky'}): 'FOUR_FINGERS',
+    }
+    return patterns.get(frozenset(extended), 'UNKNOWN')
+
+
+# Finger code (0-31) -> index into GESTURES
+GESTURE_LUT = np.array(
+    [GESTURES.index(_gesture_for_code(code)) for code in range(1 << len(FINGERS))],
+    dtype=np.int8
+)
+
+
+def landmarks_to_array(multi_hand_landmarks) -> np.ndarray:
+    """(hands, 21, 3) float32 array of x, y, z from mediapipe landmark lists"""
+    if not multi_hand_landmarks:
+        return np.empty((0, NUM_LANDMARKS, 3), dtype=np.float32)
+    return np.array(
+        [[(p.x, p.y, p.z) for p in hand.landmark] for hand in multi_hand_landmarks],
+        dtype=np.float32
+    )
+
+
+def finger_states(landmarks: np.ndarray) -> np.ndarray:
+    """(..., 5) bool extension states for (..., 21, 3) landmarks
+
+    The thumb is extended when its tip lies right of its middle joint;
+    other fingers when the tip is above (smaller y than) the base joint.
+    """
+    landmarks = np.asarray(landmarks)
+    states = landmarks[..., TIPS, 1] < landmarks[..., BASES, 1]
+    states[..., 0] = landmarks[..., TIPS[0], 0] > landmarks[..., MIDS[0], 0]
+    return states
+
+
+def finger_codes(landmarks: np.ndarray) -> np.ndarray:
+    """(...,) 5-bit finger codes for (..., 21, 3) landmarks"""
+    return (finger_states(landmarks) * FINGER_BITS).sum(axis=-1).astype(np.uint8)
+
+
+def classify(landmarks: np.ndarray) -> np.ndarray:
+    """Gesture ids (indices into GESTURES) for landmarks of any leading shape
+
+    Works on one frame of hands, (hands, 21, 3), or a whole clip,
+    (frames, hands, 21, 3).  Hands padded with NaN get ``NO_HAND``.
+    """
+    landmarks = np.asarray(landmarks, dtype=np.float32)
+    ids = GESTURE_LUT[finger_codes(landmarks)].astype(np.int8)
+    missing = np.isnan(landmarks).any(axis=(-2, -1))
+    if missing.any():
+        ids[missing] = NO_HAND
+    return ids
+
+
+def gesture_names(ids) -> List[Optional[str]]:
+    """Flat list of gesture names for an array of gesture ids"""
+    return [GESTURES[i] if i != NO_HAND else None for i in np.asarray(ids).ravel().tolist()]
+
+
+def stack_frames(frames: Sequence[np.ndarray], max_hands: int = 2) -> np.ndarray:
+    """Pad per-frame (hands, 21, 3) arrays into one (frames, max_hands, 21, 3) batch"""
+    batch = np.full((len(frames), max_hands, NUM_LANDMARKS, 3), np.nan, dtype=np.float32)
+    for i, hands in enumerate(frames):
+        hands = np.asarray(hands)[:max_hands]
+        batch[i, :len(hands)] = hands
+    return batch
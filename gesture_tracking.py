@@ -0,0 +1,216 @@
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from gesture import GESTURES, NUM_LANDMARKS, classify
+from tracker import greedy_match
+
+UNKNOWN = GESTURES.index('UNKNOWN')
+
+
+class GestureTracker:
+    """Per-hand gesture smoothing with debounced start/hold/end events
+
+    Hands are matched frame to frame by wrist position.  Each hand keeps
+    its last ``window`` gesture ids; a gesture becomes active once it
+    holds at least ``min_agreement`` of a window of at least
+    ``min_frames`` entries, so single-frame flicker never starts or ends
+    an event.  An active gesture emits ``hold`` every ``hold_interval``
+    frames, and ``end`` when another gesture takes over or the hand has
+    been missing for ``release_frames`` frames.  Frame counts follow the
+    caller's frame indices, so skipped frames still count and frames
+    older than the last one seen are ignored.
+    """
+
+    def __init__(self, window: int = 7, min_agreement: float = 0.6, min_frames: int = 3,
+                 hold_interval: int = 15, release_frames: int = 5, max_distance: float = 0.15):
+        self.window = window
+        self.min_agreement = min_agreement
+        self.min_frames = min_frames
+        self.hold_interval = hold_interval
+        self.release_frames = release_frames
+        self.max_distance = max_distance
+        self.hands: Dict[int, Dict] = {}
+        self.last_frame = -1
+        self._next_id = 0
+
+    def _match(self, wrists: np.ndarray) -> List[int]:
+        hand_ids = list(self.hands)
+        assigned = [-1] * len(wrists)
+        if hand_ids and len(wrists):
+            previous = np.array([self.hands[h]['wrist'] for h in hand_ids])
+            dist = np.linalg.norm(previous[:, None] - wrists[None], axis=2)
+            rows, cols = greedy_match(self.max_distance - dist, 0.0)
+            for r, c in zip(rows.tolist(), cols.tolist()):
+                assigned[c] = hand_ids[r]
+        for i in range(len(assigned)):
+            if assigned[i] < 0:
+                assigned[i] = self._next_id
+                self.hands[self._next_id] = {
+                    'history': deque(maxlen=self.window), 'active': None,
+                    'active_frames': 0, 'missing': 0, 'wrist': None
+                }
+                self._next_id += 1
+        return assigned
+
+    def _stable(self, history) -> Optional[int]:
+        if len(history) < self.min_frames:
+            return None
+        counts = np.bincount(np.fromiter(history, dtype=np.int64), minlength=len(GESTURES))
+        best = int(counts.argmax())
+        if counts[best] < self.min_agreement * len(history):
+            return None
+        return best
+
+    def update(self, landmarks: np.ndarray, gesture_ids: Optional[np.ndarray] = None,
+               frame_index: Optional[int] = None) -> Tuple[List[int], List[Optional[str]], List[Dict]]:
+        """Feed one frame of (hands, 21, 3) landmarks
+
+        Returns (hand ids, smoothed gesture per hand, events).  Each event
+        is a dict with ``type`` (start, hold or end), ``hand``,
+        ``gesture``, ``frame`` and ``frames`` (how long it has been held).
+        ``frame_index`` defaults to the frame after the last one; a stale
+        index returns no hands and no events.
+        """
+        if frame_index is None:
+            frame_index = self.last_frame + 1
+        if frame_index <= self.last_frame:
+            return [], [], []
+        step = frame_index - self.last_frame if self.last_frame >= 0 else 1
+        self.last_frame = frame_index
+
+        landmarks = np.asarray(landmarks, dtype=np.float32).reshape(-1, NUM_LANDMARKS, 3)
+        if gesture_ids is None:
+            gesture_ids = classify(landmarks)
+        hand_ids = self._match(landmarks[:, 0, :2])
+        events = []
+
+        seen = set(hand_ids)
+        for hand_id in list(self.hands):
+            if hand_id in seen:
+                continue
+            state = self.hands[hand_id]
+            state['missing'] += step
+            if state['missing'] >= self.release_frames:
+                if state['active'] is not None:
+                    events.append(self._event('end', hand_id, state, frame_index))
+                del self.hands[hand_id]
+
+        smoothed = []
+        for hand_id, wrist, gesture_id in zip(hand_ids, landmarks[:, 0, :2], gesture_ids.tolist()):
+            state = self.hands[hand_id]
+            state['wrist'] = wrist
+            state['missing'] = 0
+            state['history'].append(gesture_id)
+
+            stable = self._stable(state['history'])
+            if stable == UNKNOWN:
+                stable = None
+            if stable is not None and stable != state['active']:
+                if state['active'] is not None:
+                    events.append(self._event('end', hand_id, state, frame_index))
+                state['active'] = stable
+                state['active_frames'] = 0
+                events.append(self._event('start', hand_id, state, frame_index))
+            elif state['active'] is not None:
+                held = state['active_frames']
+                state['active_frames'] += step
+                if state['active_frames'] // self.hold_interval > held // self.hold_interval:
+                    events.append(self._event('hold', hand_id, state, frame_index))
+            smoothed.append(GESTURES[state['active']] if state['active'] is not None else None)
+        return hand_ids, smoothed, events
+
+    @staticmethod
+    def _event(kind, hand_id, state, frame_index) -> Dict:
+        return {
+            'type': kind,
+            'hand': hand_id,
+            'gesture': GESTURES[state['active']],
+            'frame': frame_index,
+            'frames': state['active_frames']
+        }
+
+
+class AdaptiveLandmarkSource:
+    """Runs landmark inference every ``every`` frames while hands are steady
+
+    Between inferences, landmarks are extrapolated from the last two
+    inference results at constant velocity.  Any hand moving more than
+    ``max_motion`` (normalized image units per frame), a change in the
+    number of hands, or no prior result forces inference on the next
+    frame, so fast movement is still tracked at full rate.  Given frame
+    indices, skipped frames count toward ``every`` and the extrapolation.
+    """
+
+    def __init__(self, infer: Callable[[np.ndarray], np.ndarray], every: int = 2,
+                 max_motion: float = 0.02):
+        self.infer = infer
+        self.every = max(1, every)
+        self.max_motion = max_motion
+        self.frames = 0
+        self.inferences = 0
+        self._last = None
+        self._velocity = None
+        self._since = 0
+        self._index = -1
+
+    def _steady(self) -> bool:
+        if self._last is None:
+            return False
+        if self._velocity is None:
+            return not len(self._last)
+        return bool(np.abs(self._velocity[:, 0, :2]).max(initial=0.0) <= self.max_motion)
+
+    def __call__(self, frame, frame_index: Optional[int] = None) -> Tuple[np.ndarray, bool]:
+        """(hands, 21, 3) landmarks for ``frame`` and whether they were inferred"""
+        if frame_index is None:
+            frame_index = self._index + 1
+        self.frames += 1
+        self._since += max(1, frame_index - self._index) if self._index >= 0 else 1
+        self._index = frame_index
+        if self._since < self.every and self._steady():
+            if self._velocity is None:
+                return self._last, False
+            return self._last + self._velocity * self._since, False
+
+        landmarks = np.asarray(self.infer(frame), dtype=np.float32).reshape(-1, NUM_LANDMARKS, 3)
+        self.inferences += 1
+        if self._last is not None and len(self._last) and len(self._last) == len(landmarks):
+            self._velocity = (landmarks - self._last) / self._since
+        else:
+            self._velocity = None
+        self._last = landmarks
+        self._since = 0
+        return landmarks, True
+
+    def stats(self) -> Dict:
+        return {
+            'frames': self.frames,
+            'inferences': self.inferences,
+            'inference_ratio': self.inferences / self.frames if self.frames else 0.0
+        }
+
+
+class TemporalGestureRecognizer:
+    """Adaptive landmark inference plus per-hand gesture smoothing"""
+
+    def __init__(self, infer: Callable[[np.ndarray], np.ndarray], every: int = 2,
+                 max_motion: float = 0.02, **tracker_options):
+        self.source = AdaptiveLandmarkSource(infer, every, max_motion)
+        self.tracker = GestureTracker(**tracker_options)
+
+    def process(self, frame, frame_index: Optional[int] = None):
+        """(landmarks, hand ids, smoothed gestures, events) for one frame
+
+        ``frame_index`` is the frame's position in the stream (e.g. the
+        pipeline's decode sequence).  Frames older than the last one
+        processed are discarded without running inference.
+        """
+        if frame_index is None:
+            frame_index = self.tracker.last_frame + 1
+        if frame_index <= self.tracker.last_frame:
+            return np.empty((0, NUM_LANDMARKS, 3), dtype=np.float32), [], [], []
+        landmarks, _ = self.source(frame, frame_index)
+        hand_ids, gestures, events = self.tracker.update(landmarks, frame_index=frame_index)
+        return landmarks, hand_ids, gestures, events
@@ -1,10 +1,19 @@
 import cv2
-import mediapipe as mp
 import numpy as np
 from typing import Tuple, List, Dict
+from gesture import FINGERS, GESTURES, classify, finger_states, gesture_names, landmarks_to_array
+from gesture_tracking import TemporalGestureRecognizer
+
+
+def load_mediapipe():
+    """Import mediapipe on first use; it is slow to load"""
+    import mediapipe as mp
+    return mp
+
 
 class HandDetector:
-    def __init__(self):
+    def __init__(self, every: int = 2):
+        mp = load_mediapipe()
         self.mp_hands = mp.solutions.hands
         self.hands = self.mp_hands.Hands(
             static_image_mode=False,
@@ -13,51 +22,17 @@ class HandDetector:
             min_tracking_confidence=0.7
         )
         self.mp_draw = mp.solutions.drawing_utils
+        # Temporal mode: full inference every ``every`` frames while steady
+        self.recognizer = TemporalGestureRecognizer(self.infer_landmarks, every=every)
 
     def get_finger_state(self, hand_landmarks) -> Dict[str, bool]:
         """Determine if each finger is extended"""
-        finger_tips = {
-            'thumb': (4, 3, 2),
-            'index': (8, 7, 6),
-            'middle': (12, 11, 10),
-            'ring': (16, 15, 14),
-            'pinky': (20, 19, 18)
-        }
-
-        states = {}
-        for finger, (tip, mid, base) in finger_tips.items():
-            if finger == 'thumb':
-                # Special case for thumb
-                extended = hand_landmarks.landmark[tip].x > hand_landmarks.landmark[mid].x
-            else:
-                # For other fingers, check if tip is higher than base
-                extended = hand_landmarks.landmark[tip].y < hand_landmarks.landmark[base].y
-
-            states[finger] = extended
-
-        return states
+        states = finger_states(landmarks_to_array([hand_landmarks]))[0]
+        return dict(zip(FINGERS, states.tolist()))
 
     def detect_gesture(self, hand_landmarks) -> str:
-        """Enhanced gesture detection with multiple patterns"""
-        finger_states = self.get_finger_state(hand_landmarks)
-
-        # Define gesture patterns
-        if all(finger_states.values()):
-            return "OPEN_HAND"
-        elif not any(finger_states.values()):
-            return "CLOSED_FIST"
-        elif finger_states['index'] and not any(v for k, v in finger_states.items() if k != 'index'):
-            return "POINTING"
-        elif finger_states['index'] and finger_states['middle'] and not any(v for k, v in finger_states.items() if k not in ['index', 'middle']):
-            return "PEACE"
-        elif finger_states['thumb'] and finger_states['pinky'] and not any(v for k, v in finger_states.items() if k not in ['thumb', 'pinky']):
-            return "CALL"
-        elif finger_states['thumb'] and not any(v for k, v in finger_states.items() if k != 'thumb'):
-            return "THUMBS_UP"
-        elif not finger_states['thumb'] and all(v for k, v in finger_states.items() if k != 'thumb'):
-            return "FOUR_FINGERS"
-        else:
-            return "UNKNOWN"
+        """Classify one hand via the finger-code lookup table"""
+        return GESTURES[classify(landmarks_to_array([hand_landmarks]))[0]]
 
     def detect_hands(self, frame):
         """Detect hands in the frame and return processed image with landmarks"""
@@ -66,7 +41,9 @@ class HandDetector:
 
         gestures = []
         if results.multi_hand_landmarks:
-            for hand_landmarks in results.multi_hand_landmarks:
+            # Every hand in the frame is classified in one vectorized pass
+            gestures = gesture_names(classify(landmarks_to_array(results.multi_hand_landmarks)))
+            for hand_landmarks, gesture in zip(results.multi_hand_landmarks, gestures):
                 # Draw landmarks
                 self.mp_draw.draw_landmarks(
                     frame,
@@ -74,10 +51,6 @@ class HandDetector:
                     self.mp_hands.HAND_CONNECTIONS
                 )
 
-                # Detect gesture
-                gesture = self.detect_gesture(hand_landmarks)
-                gestures.append(gesture)
-
                 # Display gesture
                 cv2.putText(
                     frame,
@@ -91,6 +64,45 @@ class HandDetector:
 
         return frame, gestures
 
+    def infer_landmarks(self, frame) -> np.ndarray:
+        """Run mediapipe on a BGR frame; (hands, 21, 3) normalized landmarks"""
+        results = self.hands.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        return landmarks_to_array(results.multi_hand_landmarks)
+
+    def draw_landmarks(self, frame, landmarks: np.ndarray):
+        """Draw (hands, 21, 3) normalized landmarks and their connections"""
+        h, w = frame.shape[:2]
+        points = np.round(landmarks[..., :2] * (w, h)).astype(np.int32)
+        for hand in points:
+            for start, end in self.mp_hands.HAND_CONNECTIONS:
+                cv2.line(frame, tuple(hand[start].tolist()), tuple(hand[end].tolist()), (0, 255, 0), 2)
+            for x, y in hand.tolist():
+                cv2.circle(frame, (x, y), 3, (0, 0, 255), -1)
+        return frame
+
+    def track_gestures(self, frame, frame_index=None):
+        """Smoothed gestures and start/hold/end events for one video frame
+
+        Unlike ``detect_hands``, landmark inference is skipped on frames
+        where the hands are steady, and gestures are debounced per hand.
+        ``frame_index`` lets skipped frames count and stale ones be
+        discarded.  Returns (frame, gestures, events).
+        """
+        landmarks, hand_ids, gestures, events = self.recognizer.process(frame, frame_index)
+        self.draw_landmarks(frame, landmarks)
+        for i, (hand_id, gesture) in enumerate(zip(hand_ids, gestures)):
+            if gesture is not None:
+                cv2.putText(
+                    frame,
+                    f"Hand {hand_id}: {gesture}",
+                    (10, 30 + 35 * i),
+                    cv2.FONT_HERSHEY_SIMPLEX,
+                    1,
+                    (0, 255, 0),
+                    2
+                )
+        return frame, gestures, events
+
     def calculate_hand_angle(self, hand_landmarks) -> float:
         """Calculate the angle of the hand relative to vertical"""
         wrist = hand_landmarks.landmark[0]
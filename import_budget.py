@@ -0,0 +1,56 @@
+import json
+import subprocess
+import sys
+from typing import Dict, Iterable
+
+# Headless modules a server process imports at start-up
+HEADLESS_MODULES = (
+    'detection_core', 'detection_service', 'vehicle_detection', 'hand_detection',
+    'database', 'analytics', 'retention', 'stream_manager', 'alerts', 'resources',
+)
+
+# Heavy or GUI dependencies that must only load when actually used
+LAZY_DEPENDENCIES = ('tkinter', 'tkinterdnd2', 'pyttsx3', 'pandas', 'mediapipe', 'easyocr')
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'loaded': [m for m in {lazy!r} if m in sys.modules]}}))
+"""
+
+
+def measure_import(module: str) -> Dict:
+    """Cold import time of ``module`` in a fresh interpreter, plus any lazy
+    dependencies it pulled in"""
+    probe = _PROBE.format(module=module, lazy=LAZY_DEPENDENCIES)
+    result = subprocess.run([sys.executable, '-c', probe], capture_output=True, text=True)
+    if result.returncode != 0:
+        return {'seconds': None, 'loaded': [], 'error': result.stderr.strip().splitlines()[-1]}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def check_budget(modules: Iterable[str] = HEADLESS_MODULES, budget: float = 2.0) -> bool:
+    """Print a report; False if any module is over budget, fails to import
+    or eagerly imports a lazy dependency"""
+    ok = True
+    for module in modules:
+        report = measure_import(module)
+        if report.get('error'):
+            print(f"{module:<20} ERROR  {report['error']}")
+            ok = False
+            continue
+        over = report['seconds'] > budget
+        status = 'SLOW' if over else ('EAGER' if report['loaded'] else 'ok')
+        extra = f"  loaded {', '.join(report['loaded'])}" if report['loaded'] else ''
+        print(f"{module:<20} {status:<6} {report['seconds'] * 1000:8.1f} ms{extra}")
+        ok = ok and not over and not report['loaded']
+    return ok
+
+
+if __name__ == "__main__":
+    # Usage: python import_budget.py [budget_seconds] [module ...]
+    args = sys.argv[1:]
+    budget = float(args.pop(0)) if args and args[0].replace('.', '', 1).isdigit() else 2.0
+    sys.exit(0 if check_budget(args or HEADLESS_MODULES, budget) else 1)
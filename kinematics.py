@@ -0,0 +1,157 @@
+import json
+from typing import Dict, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+# Compass-style labels for image-space motion, indexed by quadrant
+DIRECTIONS = np.array(['right', 'down', 'left', 'up', 'unknown', 'stationary'])
+UNKNOWN, STATIONARY = 4, 5
+
+
+class Calibration:
+    """Image-to-ground mapping for one camera
+
+    With a 3x3 ``homography`` image points are projected onto the road
+    plane in metres; without one a flat ``meters_per_pixel`` scale is
+    used.
+    """
+
+    def __init__(self, homography: Optional[np.ndarray] = None, meters_per_pixel: float = 0.1):
+        self.homography = None if homography is None else np.asarray(homography, dtype=np.float64)
+        self.meters_per_pixel = meters_per_pixel
+
+    @classmethod
+    def from_points(cls, image_points: Sequence[Sequence[float]],
+                    world_points: Sequence[Sequence[float]]) -> 'Calibration':
+        """Fit a homography from four or more image/ground point pairs (ground in metres)"""
+        homography, _ = cv2.findHomography(
+            np.asarray(image_points, dtype=np.float64),
+            np.asarray(world_points, dtype=np.float64)
+        )
+        if homography is None:
+            raise ValueError("Calibration points are degenerate")
+        return cls(homography)
+
+    @classmethod
+    def from_dict(cls, config: Dict) -> 'Calibration':
+        if 'homography' in config:
+            return cls(config['homography'])
+        if 'image_points' in config:
+            return cls.from_points(config['image_points'], config['world_points'])
+        return cls(meters_per_pixel=config.get('meters_per_pixel', 0.1))
+
+    def to_world(self, points: np.ndarray) -> np.ndarray:
+        """(N, 2) image pixels -> (N, 2) ground-plane metres"""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        if self.homography is None:
+            return points * self.meters_per_pixel
+        projected = points @ self.homography[:, :2].T + self.homography[:, 2]
+        return projected[:, :2] / projected[:, 2:3]
+
+
+def load_calibrations(path: str) -> Dict[str, Calibration]:
+    """Per-camera calibrations from a JSON file keyed by camera id"""
+    with open(path, encoding='utf-8') as f:
+        return {camera: Calibration.from_dict(config) for camera, config in json.load(f).items()}
+
+
+class KinematicsEstimator:
+    """Speed and heading of every track from capture timestamps
+
+    Track state (last image and ground position, time and smoothed
+    ground velocity) is kept in arrays sorted by track id, so one
+    ``update`` per frame handles every vehicle with a handful of numpy
+    operations.  Velocities are exponentially smoothed with weight
+    ``smoothing`` on the newest measurement.  Tracks unseen for
+    ``max_age`` seconds are dropped.
+    """
+
+    def __init__(self, calibration: Optional[Calibration] = None, smoothing: float = 0.4,
+                 min_speed: float = 1.0, max_age: float = 2.0):
+        self.calibration = calibration or Calibration()
+        self.smoothing = smoothing
+        self.min_speed = min_speed  # km/h below which a track is stationary
+        self.max_age = max_age
+        self.ids = np.empty(0, dtype=np.int64)
+        self.pixels = np.empty((0, 2))
+        self.world = np.empty((0, 2))
+        self.times = np.empty(0)
+        self.velocity = np.empty((0, 2))
+        self.moves = np.empty(0, dtype=np.int64)  # measurements after the first
+
+    def update(self, track_ids, centers, timestamp: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Speeds (km/h), headings and direction labels for (N,) ids at (N, 2) centres
+
+        The heading is in degrees clockwise from the ground plane's +y
+        axis (NaN until a track has moved); the direction label describes
+        image-space motion (left, right, up, down), "unknown" for a new
+        track and "stationary" below ``min_speed``.
+        """
+        track_ids = np.asarray(track_ids, dtype=np.int64).reshape(-1)
+        centers = np.asarray(centers, dtype=np.float64).reshape(-1, 2)
+        world = self.calibration.to_world(centers)
+
+        rows = np.searchsorted(self.ids, track_ids)
+        known = rows < len(self.ids)
+        known[known] = self.ids[rows[known]] == track_ids[known]
+        # Negative ids are unconfirmed detections; they get no state
+        valid = track_ids >= 0
+        known &= valid
+        old = rows[known]
+
+        speeds = np.zeros(len(track_ids))
+        headings = np.full(len(track_ids), np.nan)
+        labels = np.full(len(track_ids), UNKNOWN)
+
+        if len(old):
+            dt = np.maximum(timestamp - self.times[old], 1e-3)[:, None]
+            measured = (world[known] - self.world[old]) / dt
+            first = (self.moves[old] == 0)[:, None]
+            velocity = np.where(first, measured,
+                                self.smoothing * measured + (1 - self.smoothing) * self.velocity[old])
+            speed = np.hypot(velocity[:, 0], velocity[:, 1]) * 3.6
+
+            # Image-space direction from the displacement before overwriting it
+            delta = centers[known] - self.pixels[old]
+            quadrant = np.where(np.abs(delta[:, 0]) > np.abs(delta[:, 1]),
+                                np.where(delta[:, 0] > 0, 0, 2),
+                                np.where(delta[:, 1] > 0, 1, 3))
+
+            speeds[known] = speed
+            headings[known] = np.degrees(np.arctan2(velocity[:, 0], velocity[:, 1])) % 360
+            labels[known] = np.where(speed < self.min_speed, STATIONARY, quadrant)
+
+            self.velocity[old] = velocity
+            self.world[old] = world[known]
+            self.pixels[old] = centers[known]
+            self.times[old] = timestamp
+            self.moves[old] += 1
+
+        new = ~known & valid
+        if new.any():
+            new_ids, first = np.unique(track_ids[new], return_index=True)
+            order = np.argsort(np.concatenate([self.ids, new_ids]), kind='stable')
+            self.ids = np.concatenate([self.ids, new_ids])[order]
+            self.pixels = np.vstack([self.pixels, centers[new][first]])[order]
+            self.world = np.vstack([self.world, world[new][first]])[order]
+            self.times = np.concatenate([self.times, np.full(len(new_ids), float(timestamp))])[order]
+            self.velocity = np.vstack([self.velocity, np.zeros((len(new_ids), 2))])[order]
+            self.moves = np.concatenate([self.moves, np.zeros(len(new_ids), dtype=np.int64)])[order]
+
+        self._keep(timestamp - self.times <= self.max_age)
+        return speeds, headings, DIRECTIONS[labels]
+
+    def forget(self, track_ids):
+        """Drop the given tracks (e.g. ones the tracker has expired)"""
+        self._keep(~np.isin(self.ids, np.asarray(track_ids, dtype=np.int64)))
+
+    def _keep(self, keep: np.ndarray):
+        if keep.all():
+            return
+        self.ids = self.ids[keep]
+        self.pixels = self.pixels[keep]
+        self.world = self.world[keep]
+        self.times = self.times[keep]
+        self.velocity = self.velocity[keep]
+        self.moves = self.moves[keep]
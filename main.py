@@ -1,16 +1,28 @@
 import streamlit as st
-from auth import Auth
-from database import Database
-from ecp import SecuritySystem
+from detection_core import SecuritySystem
+from resources import registry
 from PIL import Image
+from datetime import datetime
 import io
 import time
 import os
 
-# Initialize components
-auth = Auth()
-db = Database()
-security_system = SecuritySystem()
+# Shared components are built once per process, not on every rerun
+registry.warm_up()
+db = registry.get('database')
+auth = registry.get('auth')
+analytics = registry.get('analytics')
+
+
+def create_security_system():
+    system = SecuritySystem()
+    system.camera_id = "Main Gate"
+    system.event_writer = registry.get('detection_writer')
+    return system
+
+
+# Motion state (previous frame, history) is per viewer
+security_system = registry.session(st.session_state, 'security_system', create_security_system)
 
 def main():
     st.set_page_config(
@@ -24,7 +36,7 @@ def main():
     if 'detection_active' not in st.session_state:
         st.session_state['detection_active'] = False
 
-    if not st.session_state['logged_in']:
+    if not st.session_state['logged_in'] or not auth.is_logged_in():
         show_login_page()
     else:
         show_main_page()
@@ -45,11 +57,12 @@ def show_login_page():
             col_btn1, col_btn2 = st.columns([1, 2])
             with col_btn1:
                 if st.button("🚀 Login", type="primary", use_container_width=True):
-                    if auth.login_user(username, password):
-                        st.success("Welcome to Sixth Sense Vision!")
+                    success, message = auth.login_user(username, password)
+                    if success:
+                        st.success(message)
                         st.rerun()
                     else:
-                        st.error("Invalid credentials")
+                        st.error(message)
 
         with tab2:
             username = st.text_input("New Username", key="register_username")
@@ -138,7 +151,45 @@ def show_main_page():
 
 def show_analytics():
     st.title("📊 Analytics Dashboard")
-    st.info("Analytics features coming soon!")
+
+    days = st.selectbox("Time Range", [1, 7, 30, 90], index=1,
+                        format_func=lambda d: f"Last {d} day{'s' if d > 1 else ''}")
+    since = time.time() - days * 86400
+
+    summary = analytics.summary(since)
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Total Detections", summary['total_detections'])
+    col2.metric("Vehicles", summary['vehicle_count'])
+    col3.metric("People", summary['person_count'])
+    col4.metric("Motion Events", summary['motion_events'])
+
+    if not summary['total_detections']:
+        st.info("No detections recorded in this period")
+        return
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("🕒 Hourly Activity")
+        st.bar_chart(analytics.hourly_activity(since))
+
+        st.subheader("🏷️ Detections by Class")
+        st.bar_chart(analytics.class_counts(since))
+
+    with col2:
+        st.subheader("🗺️ Zone Heatmap")
+        heatmap = analytics.zone_heatmap(
+            (security_system.motion_engine.rows, security_system.motion_engine.cols), since
+        )
+        st.dataframe(heatmap, use_container_width=True)
+
+        st.subheader("📈 Camera Trends")
+        trends = analytics.camera_trends(since)
+        buckets = sorted({start for series in trends.values() for start, _ in series})
+        chart = {"day": [datetime.fromtimestamp(b).strftime("%Y-%m-%d") for b in buckets]}
+        for camera, series in trends.items():
+            counts = dict(series)
+            chart[camera] = [counts.get(b, 0) for b in buckets]
+        st.line_chart(chart, x="day")
 
 def show_search_analysis():
     st.header("🔍 Search & Analysis")
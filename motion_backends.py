@@ -0,0 +1,202 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+
+import cv2
+import numpy as np
+
+
+class LearningRateSchedule:
+    """Background learning rate that starts fast and settles
+
+    The rate decays geometrically from ``initial`` to ``final`` over
+    ``warmup`` frames, so a fresh model absorbs the scene quickly and then
+    adapts only slowly (slow movers are not learned into the background).
+    """
+
+    def __init__(self, initial: float = 0.5, final: float = 0.005, warmup: int = 60):
+        self.initial = initial
+        self.final = final
+        self.warmup = max(1, warmup)
+
+    def __call__(self, frame_index: int) -> float:
+        progress = min(1.0, frame_index / self.warmup)
+        return self.initial * (self.final / self.initial) ** progress
+
+
+class MotionBackend(ABC):
+    """Turns blurred grayscale frames into a binary foreground mask
+
+    ``mask`` returns None until the backend has a reference to compare
+    against.  ``threshold`` is the intensity difference (0-255) treated
+    as motion; DetectionService sets it from the sensitivity.
+    """
+
+    name = 'base'
+
+    def __init__(self, threshold: int = 25):
+        self.threshold = threshold
+        self.frames = 0
+
+    @abstractmethod
+    def mask(self, gray: np.ndarray) -> Optional[np.ndarray]:
+        """Foreground mask (0 or 255) for ``gray``, or None while warming up"""
+
+    def reset(self):
+        self.frames = 0
+
+
+class FrameDiffBackend(MotionBackend):
+    """Difference against the previous frame (the original behaviour)"""
+
+    name = 'frame_diff'
+
+    def __init__(self, threshold: int = 25):
+        super().__init__(threshold)
+        self.prev_frame = None
+
+    def mask(self, gray):
+        self.frames += 1
+        prev = self.prev_frame
+        self.prev_frame = gray
+        if prev is None:
+            return None
+        if prev.shape != gray.shape:
+            # Scale was re-tuned; resample the reference frame to match
+            prev = cv2.resize(prev, (gray.shape[1], gray.shape[0]), interpolation=cv2.INTER_AREA)
+        frame_delta = cv2.absdiff(prev, gray)
+        return cv2.threshold(frame_delta, self.threshold, 255, cv2.THRESH_BINARY)[1]
+
+    def reset(self):
+        super().reset()
+        self.prev_frame = None
+
+
+class RunningAverageBackend(MotionBackend):
+    """Difference against an exponentially weighted background image
+
+    Foreground pixels are not learned, so passing objects are never
+    absorbed; a pixel that stays foreground for ``absorb_frames``
+    consecutive frames is a static change (a parked car, a moved chair)
+    and is copied into the background.
+    """
+
+    name = 'running_average'
+
+    def __init__(self, threshold: int = 25, schedule: Optional[LearningRateSchedule] = None,
+                 absorb_frames: int = 150):
+        super().__init__(threshold)
+        self.schedule = schedule or LearningRateSchedule()
+        self.absorb_frames = absorb_frames
+        self.background = None
+        self.foreground_frames = None
+
+    def mask(self, gray):
+        if self.background is not None and self.background.shape != gray.shape:
+            self.background = cv2.resize(self.background, (gray.shape[1], gray.shape[0]),
+                                         interpolation=cv2.INTER_AREA)
+            self.foreground_frames = np.zeros(gray.shape, dtype=np.uint16)
+        if self.background is None:
+            self.background = gray.astype(np.float32)
+            self.foreground_frames = np.zeros(gray.shape, dtype=np.uint16)
+            self.frames = 1
+            return None
+
+        frame_delta = cv2.absdiff(gray, cv2.convertScaleAbs(self.background))
+        foreground = cv2.threshold(frame_delta, self.threshold, 255, cv2.THRESH_BINARY)[1]
+        # Learn only where the scene is static, so intruders are not absorbed
+        cv2.accumulateWeighted(gray, self.background, self.schedule(self.frames),
+                               mask=cv2.bitwise_not(foreground))
+
+        # Count consecutive foreground frames per pixel (zeroed elsewhere)
+        moving = foreground > 0
+        self.foreground_frames += moving
+        self.foreground_frames *= moving
+        if self.foreground_frames.max() >= self.absorb_frames:
+            settled = self.foreground_frames >= self.absorb_frames
+            self.background[settled] = gray[settled]
+            self.foreground_frames[settled] = 0
+        self.frames += 1
+        return foreground
+
+    def reset(self):
+        super().reset()
+        self.background = None
+        self.foreground_frames = None
+
+
+class SubtractorBackend(MotionBackend):
+    """OpenCV MOG2 or KNN per-pixel background model
+
+    The mixture models tolerate repetitive background motion such as
+    foliage or flicker.  Shadows are detected and ignored.  ``threshold``
+    is mapped onto the model's own distance threshold, and changes to it
+    are pushed into the live model without relearning.
+    """
+
+    def __init__(self, kind: str = 'mog2', threshold: int = 25, history: int = 500,
+                 schedule: Optional[LearningRateSchedule] = None):
+        super().__init__(threshold)
+        self.kind = kind.lower()
+        if self.kind not in ('mog2', 'knn'):
+            raise ValueError(f"Unknown background subtractor: {kind}")
+        self.name = self.kind
+        self.history = history
+        self.schedule = schedule or LearningRateSchedule()
+        self.model = None
+        self.shape = None
+        self.model_threshold = None
+
+    def _create(self):
+        if self.kind == 'mog2':
+            model = cv2.createBackgroundSubtractorMOG2(history=self.history, detectShadows=True)
+        else:
+            model = cv2.createBackgroundSubtractorKNN(history=self.history, detectShadows=True)
+        self.model_threshold = None
+        return model
+
+    def _apply_threshold(self):
+        if self.kind == 'mog2':
+            # varThreshold is a squared Mahalanobis distance
+            self.model.setVarThreshold(max(4.0, (self.threshold / 3.0) ** 2))
+        else:
+            # dist2Threshold is a squared intensity distance
+            self.model.setDist2Threshold(float(self.threshold ** 2))
+        self.model_threshold = self.threshold
+
+    def mask(self, gray):
+        if self.model is None or self.shape != gray.shape:
+            # A learned model cannot be resampled; start over at the new scale
+            self.model = self._create()
+            self.shape = gray.shape
+            self.frames = 0
+        if self.model_threshold != self.threshold:
+            self._apply_threshold()
+        foreground = self.model.apply(gray, learningRate=self.schedule(self.frames))
+        self.frames += 1
+        if self.frames == 1:
+            return None
+        # Shadows are marked 127; keep only confident foreground
+        return cv2.threshold(foreground, 200, 255, cv2.THRESH_BINARY)[1]
+
+    def reset(self):
+        super().reset()
+        self.model = None
+        self.shape = None
+        self.model_threshold = None
+
+
+MOTION_BACKENDS = {
+    'frame_diff': FrameDiffBackend,
+    'running_average': RunningAverageBackend,
+    'mog2': lambda **options: SubtractorBackend('mog2', **options),
+    'knn': lambda **options: SubtractorBackend('knn', **options),
+}
+
+
+def create_motion_backend(name: str = 'frame_diff', **options) -> MotionBackend:
+    """Build a motion backend by name: frame_diff, running_average, mog2 or knn"""
+    try:
+        factory = MOTION_BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown motion backend: {name}")
+    return factory(**options)
@@ -0,0 +1,158 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+def perceptual_hash(crop: np.ndarray) -> int:
+    """64-bit difference hash of a plate crop"""
+    if crop.ndim == 3:
+        crop = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(crop, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int(np.packbits(bits).view('>u8')[0])
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+class PlateCache:
+    """LRU cache of OCR results with a time-to-live
+
+    Entries are keyed by track (or by hash for untracked crops) and hit
+    when the new crop's hash is within ``max_distance`` bits of the one
+    that was read, so small jitter does not force a re-read.
+    """
+
+    def __init__(self, capacity: int = 512, ttl: float = 10.0, max_distance: int = 6):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.max_distance = max_distance
+        self._entries: 'OrderedDict[Hashable, Tuple[int, str, float, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, phash: int) -> Optional[Tuple[str, float]]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                cached_hash, text, confidence, stored = entry
+                if now - stored <= self.ttl and hamming(cached_hash, phash) <= self.max_distance:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return text, confidence
+                if now - stored > self.ttl:
+                    del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, phash: int, text: str, confidence: float):
+        with self._lock:
+            self._entries[key] = (phash, text, confidence, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+
+class PlateOCRStage:
+    """Off-thread plate OCR that batches crops from every camera
+
+    ``submit`` returns a cached reading immediately when the track's crop
+    has not changed, otherwise queues the crop and returns None.  A worker
+    thread groups queued crops into a single ``readtext_batched`` call and
+    publishes results by (camera, track) for ``result`` to pick up.
+    """
+
+    def __init__(self, reader, batch_size: int = 16, max_wait: float = 0.05,
+                 cache: Optional[PlateCache] = None,
+                 crop_size: Tuple[int, int] = (200, 64),
+                 on_result: Optional[Callable[[Hashable, Hashable, str, float], None]] = None):
+        self.reader = reader
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.cache = cache or PlateCache()
+        self.crop_size = crop_size
+        self.on_result = on_result
+        self._queue: 'OrderedDict[Tuple[Hashable, Hashable], Tuple[np.ndarray, int]]' = OrderedDict()
+        self._results: 'OrderedDict[Tuple[Hashable, Hashable], Tuple[str, float]]' = OrderedDict()
+        self._cond = threading.Condition()
+        self._running = True
+        self.batches = 0
+        self._worker = threading.Thread(target=self._run, name='plate-ocr', daemon=True)
+        self._worker.start()
+
+    def submit(self, camera: Hashable, track_id: Optional[Hashable],
+               crop: np.ndarray) -> Optional[Tuple[str, float]]:
+        phash = perceptual_hash(crop)
+        key = (camera, track_id if track_id is not None else phash)
+        cached = self.cache.get(key, phash)
+        if cached is not None:
+            return cached
+        with self._cond:
+            # A newer crop for the same track replaces the queued one
+            self._queue[key] = (crop.copy(), phash)
+            self._queue.move_to_end(key)
+            self._cond.notify()
+        return None
+
+    def result(self, camera: Hashable, track_id: Hashable) -> Optional[Tuple[str, float]]:
+        """Latest reading published for a track, if any"""
+        with self._cond:
+            return self._results.get((camera, track_id))
+
+    def _next_batch(self) -> List:
+        with self._cond:
+            while self._running and not self._queue:
+                self._cond.wait()
+            if not self._running:
+                return []
+            deadline = time.monotonic() + self.max_wait
+            while len(self._queue) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._running:
+                    break
+                self._cond.wait(remaining)
+            batch = []
+            while self._queue and len(batch) < self.batch_size:
+                batch.append(self._queue.popitem(last=False))
+            return batch
+
+    def _run(self):
+        while self._running:
+            batch = self._next_batch()
+            if not batch:
+                continue
+            try:
+                crops = [crop for _, (crop, _) in batch]
+                readings = self.reader.readtext_batched(
+                    crops, n_width=self.crop_size[0], n_height=self.crop_size[1]
+                )
+                self.batches += 1
+            except Exception as e:
+                print(f"Error reading plates: {str(e)}")
+                continue
+
+            for (key, (_, phash)), results in zip(batch, readings):
+                if not results:
+                    continue
+                text, confidence = results[0][1], float(results[0][2])
+                self.cache.put(key, phash, text, confidence)
+                with self._cond:
+                    self._results[key] = (text, confidence)
+                    self._results.move_to_end(key)
+                    while len(self._results) > self.cache.capacity:
+                        self._results.popitem(last=False)
+                if self.on_result is not None:
+                    self.on_result(key[0], key[1], text, confidence)
+
+    def close(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self._worker.join(timeout=1.0)
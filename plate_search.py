@@ -0,0 +1,221 @@
+import re
+import sqlite3
+from functools import lru_cache
+
+# OCR-confusable letters folded onto the digit they are misread as.  Only
+# the classic O/0, I/1 and B/8 pairs by default; wider folding (e.g. S/5,
+# Z/2) finds more misreads but also matches genuinely different plates
+# (AB5 vs ABS).  Stored plates are re-normalized on start when this changes.
+CONFUSABLES = {'O': '0', 'I': '1', 'B': '8'}
+
+RECORD_COLUMNS = ('id', 'plate_number', 'detected_at', 'owner_name',
+                  'vehicle_type', 'notes')
+
+
+@lru_cache(maxsize=8)
+def _fold_table(pairs):
+    return str.maketrans(dict(pairs))
+
+
+def normalize_plate(plate, confusables=None):
+    """Uppercase, drop separators and fold OCR-confusable characters"""
+    if plate is None:
+        return None
+    confusables = CONFUSABLES if confusables is None else confusables
+    table = _fold_table(tuple(sorted(confusables.items())))
+    return re.sub(r'[^A-Z0-9]', '', plate.upper()).translate(table)
+
+
+def folding_key(confusables=None):
+    """Stable description of a confusable map, stored with the data"""
+    confusables = CONFUSABLES if confusables is None else confusables
+    return ",".join(f"{k}{v}" for k, v in sorted(confusables.items()))
+
+
+def trigram_available(conn):
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp.trigram_probe USING fts5(x, tokenize='trigram')")
+        conn.execute("DROP TABLE temp.trigram_probe")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def ensure_search_schema(conn):
+    """Add the normalized plate column, indexes and trigram FTS index
+
+    Safe to run on every start.  Returns True when the FTS5 trigram index
+    is available; otherwise plate searches fall back to LIKE on the
+    normalized column.
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(vehicle_records)")}
+    if 'plate_normalized' not in columns:
+        conn.execute("ALTER TABLE vehicle_records ADD COLUMN plate_normalized TEXT")
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS search_settings (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    """)
+    stored = conn.execute("SELECT value FROM search_settings WHERE key = 'confusables'").fetchone()
+    renormalize = 'plate_normalized' not in columns or stored is None or stored[0] != folding_key()
+
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_vehicle_detected_at ON vehicle_records (detected_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_vehicle_plate ON vehicle_records (plate_normalized)")
+    # Serve prefix and exact owner/type lookups; substring matches still scan
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_vehicle_owner ON vehicle_records (owner_name COLLATE NOCASE)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_vehicle_type ON vehicle_records (vehicle_type COLLATE NOCASE)")
+
+    if not trigram_available(conn):
+        if renormalize:
+            _renormalize(conn)
+        return False
+
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'vehicle_plates_fts'"
+    ).fetchone()
+    if not exists:
+        conn.execute("""
+            CREATE VIRTUAL TABLE vehicle_plates_fts USING fts5(
+                plate_normalized,
+                content='vehicle_records',
+                content_rowid='id',
+                tokenize='trigram'
+            )
+        """)
+        conn.execute("INSERT INTO vehicle_plates_fts(vehicle_plates_fts) VALUES ('rebuild')")
+
+    stale = conn.execute("SELECT value FROM search_settings WHERE key = 'fts_stale'").fetchone()
+    if stale is not None and stale[0] == '1':
+        # A bulk load stopped before it could rebuild the index
+        resume_plate_index(conn)
+    else:
+        conn.execute(INSERT_TRIGGER)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS vehicle_plates_ad AFTER DELETE ON vehicle_records BEGIN
+            INSERT INTO vehicle_plates_fts(vehicle_plates_fts, rowid, plate_normalized)
+            VALUES ('delete', old.id, old.plate_normalized);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS vehicle_plates_au AFTER UPDATE OF plate_normalized ON vehicle_records BEGIN
+            INSERT INTO vehicle_plates_fts(vehicle_plates_fts, rowid, plate_normalized)
+            VALUES ('delete', old.id, old.plate_normalized);
+            INSERT INTO vehicle_plates_fts(rowid, plate_normalized)
+            VALUES (new.id, new.plate_normalized);
+        END
+    """)
+    if renormalize:
+        # Runs after the triggers exist, so the FTS index follows
+        _renormalize(conn)
+    return True
+
+
+INSERT_TRIGGER = """
+    CREATE TRIGGER IF NOT EXISTS vehicle_plates_ai AFTER INSERT ON vehicle_records BEGIN
+        INSERT INTO vehicle_plates_fts(rowid, plate_normalized)
+        VALUES (new.id, new.plate_normalized);
+    END
+"""
+
+
+def _set_setting(conn, key, value):
+    conn.execute(
+        "INSERT INTO search_settings (key, value) VALUES (?, ?) "
+        "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+        (key, value)
+    )
+
+
+def suspend_plate_index(conn):
+    """Stop indexing inserted plates, for a bulk load
+
+    The index is marked stale first, so an interrupted load is repaired
+    by ``ensure_search_schema`` on the next start.
+    """
+    _set_setting(conn, 'fts_stale', '1')
+    conn.execute("DROP TRIGGER IF EXISTS vehicle_plates_ai")
+
+
+def resume_plate_index(conn):
+    """Rebuild the trigram index in one pass and resume per-row indexing"""
+    conn.execute("INSERT INTO vehicle_plates_fts(vehicle_plates_fts) VALUES ('rebuild')")
+    conn.execute(INSERT_TRIGGER)
+    _set_setting(conn, 'fts_stale', '0')
+
+
+def _renormalize(conn):
+    """Recompute every stored plate_normalized with the current folding"""
+    rows = conn.execute("SELECT id, plate_number, plate_normalized FROM vehicle_records").fetchall()
+    updates = []
+    for row_id, plate, stored in rows:
+        normalized = normalize_plate(plate)
+        if normalized != stored:
+            updates.append((normalized, row_id))
+    conn.executemany("UPDATE vehicle_records SET plate_normalized = ? WHERE id = ?", updates)
+    _set_setting(conn, 'confusables', folding_key())
+
+
+def text_filter(column, term, match="contains"):
+    """Case-insensitive WHERE clause and parameter for a text column
+
+    ``match`` is "contains" (substring, a table scan), "prefix" or
+    "exact"; the last two are served by the column's NOCASE index.
+    """
+    if match == "exact":
+        return f"{column} = ? COLLATE NOCASE", term
+    if match == "prefix":
+        return f"{column} LIKE ? ESCAPE '\\'", escape_like(term) + '%'
+    if match == "contains":
+        return f"{column} LIKE ? ESCAPE '\\'", '%' + escape_like(term) + '%'
+    raise ValueError(f"Unknown match mode: {match}")
+
+
+def search_page(conn, search_term, search_type="plate_number", limit=100,
+                cursor=None, use_fts=True, match="contains"):
+    """One page of vehicle records, newest first
+
+    Plates match as substrings of the normalized plate (trigram index for
+    terms of three or more characters).  Owner name and vehicle type are
+    case-insensitive matches as chosen by ``match`` (see ``text_filter``).
+    ``cursor`` is the ``(detected_at, id)`` of the last row of the
+    previous page; the returned cursor is None on the last page.
+    """
+    select = "SELECT {} FROM vehicle_records".format(", ".join(RECORD_COLUMNS))
+    params = []
+
+    if search_type == "Owner Name":
+        where, param = text_filter("owner_name", search_term, match)
+        params.append(param)
+    elif search_type == "Vehicle Type":
+        where, param = text_filter("vehicle_type", search_term, match)
+        params.append(param)
+    else:  # Default to plate number search
+        term = normalize_plate(search_term) or ''
+        if use_fts and len(term) >= 3:
+            where = "id IN (SELECT rowid FROM vehicle_plates_fts WHERE vehicle_plates_fts MATCH ?)"
+            params.append('"{}"'.format(term))
+        else:
+            where = "plate_normalized LIKE ?"
+            params.append('%' + term + '%')
+
+    if cursor is not None:
+        where += " AND (detected_at < ? OR (detected_at = ? AND id < ?))"
+        params.extend([cursor[0], cursor[0], cursor[1]])
+
+    query = f"{select} WHERE {where} ORDER BY detected_at DESC, id DESC"
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit + 1)
+
+    rows = conn.execute(query, params).fetchall()
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = (rows[-1][2], rows[-1][0])
+    return [dict(zip(RECORD_COLUMNS, row)) for row in rows], next_cursor
+
+
+def escape_like(term):
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
@@ -0,0 +1,157 @@
+import atexit
+import threading
+from typing import Callable, Dict, Iterable, List, MutableMapping, Optional
+
+
+class ResourceRegistry:
+    """Process-wide, lazily built singletons for models and services
+
+    Each registered factory runs at most once per process, the first time
+    its resource is requested (or during ``warm_up``); concurrent callers
+    wait on a per-resource lock instead of loading twice.  The registry
+    lives at module scope, so Streamlit reruns and sessions all share it.
+    Only share resources that are read-only or thread-safe; stateful
+    per-viewer objects belong in ``session``.  Background services
+    register a ``close`` callback, which ``shutdown`` runs in reverse
+    load order.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable] = {}
+        self._warm: Dict[str, bool] = {}
+        self._closers: Dict[str, Callable] = {}
+        self._instances: Dict[str, object] = {}
+        self._loaded: List[str] = []
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._warm_thread = None
+
+    def register(self, name: str, factory: Callable, warm: bool = False,
+                 close: Optional[Callable] = None):
+        """Register ``factory()``; ``warm`` resources are built by ``warm_up``
+
+        ``close(instance)`` is called by ``shutdown`` if it was built.
+        """
+        with self._lock:
+            self._factories[name] = factory
+            self._warm[name] = warm
+            if close is not None:
+                self._closers[name] = close
+            self._locks.setdefault(name, threading.Lock())
+
+    def get(self, name: str):
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        if name not in self._factories:
+            raise KeyError(f"Unknown resource: {name}")
+        with self._locks[name]:
+            instance = self._instances.get(name)
+            if instance is None:
+                instance = self._factories[name]()
+                self._instances[name] = instance
+                with self._lock:
+                    self._loaded.append(name)
+        return instance
+
+    def loaded(self, name: str) -> bool:
+        return name in self._instances
+
+    def session(self, state: MutableMapping, name: str, factory: Callable):
+        """Per-session resource kept in ``state`` (e.g. st.session_state)"""
+        key = f"_resource_{name}"
+        if key not in state:
+            state[key] = factory()
+        return state[key]
+
+    def warm_up(self, names: Optional[Iterable[str]] = None, background: bool = True):
+        """Build the given (default: warm) resources once, optionally off-thread"""
+        with self._lock:
+            if names is None:
+                names = [name for name, warm in self._warm.items() if warm]
+            names = list(names)
+            if background:
+                if self._warm_thread is not None:
+                    return self._warm_thread
+                self._warm_thread = threading.Thread(
+                    target=self._load_all, args=(names,), name='resource-warm-up', daemon=True
+                )
+                self._warm_thread.start()
+                return self._warm_thread
+        self._load_all(names)
+
+    def shutdown(self):
+        """Close built resources, most recently built first"""
+        with self._lock:
+            names, self._loaded = self._loaded[::-1], []
+        for name in names:
+            instance = self._instances.pop(name, None)
+            close = self._closers.get(name)
+            if instance is None or close is None:
+                continue
+            try:
+                close(instance)
+            except Exception as e:
+                print(f"Error shutting down {name}: {str(e)}")
+
+    def _load_all(self, names):
+        for name in names:
+            try:
+                self.get(name)
+            except Exception as e:
+                print(f"Error warming up {name}: {str(e)}")
+
+
+def _easyocr_reader():
+    import easyocr
+    return easyocr.Reader(['en'])
+
+
+def _plate_ocr_stage():
+    from plate_ocr import PlateOCRStage
+    return PlateOCRStage(registry.get('easyocr'))
+
+
+def _database():
+    from database import Database
+    return Database()
+
+
+def _auth():
+    from auth import Auth
+    return Auth(registry.get('database'))
+
+
+def _analytics():
+    from analytics import AnalyticsEngine
+    return AnalyticsEngine(registry.get('database'))
+
+
+def _retention():
+    from retention import RetentionManager
+    return RetentionManager(registry.get('database'), analytics=registry.get('analytics')).start()
+
+
+def _alert_dispatcher():
+    from alerts import AlertDispatcher, EmailJSTransport
+    return AlertDispatcher(EmailJSTransport())
+
+
+def _detection_writer():
+    return registry.get('database').start_detection_writer()
+
+
+# Default registry shared by the Streamlit app and headless services
+registry = ResourceRegistry()
+registry.register('database', _database, warm=True)
+registry.register('auth', _auth, warm=True)
+registry.register('analytics', _analytics, warm=True)
+registry.register('detection_writer', _detection_writer, warm=True,
+                  close=lambda writer: writer.close())
+registry.register('retention', _retention, warm=True, close=lambda retention: retention.stop())
+registry.register('alert_dispatcher', _alert_dispatcher, close=lambda dispatcher: dispatcher.close())
+registry.register('easyocr', _easyocr_reader)
+registry.register('plate_ocr', _plate_ocr_stage)
+
+# Flush writers and stop background threads when the process exits
+atexit.register(registry.shutdown)
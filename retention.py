@@ -0,0 +1,343 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+DAY = 86400
+HOUR = 3600
+
+
+def ensure_retention_schema(conn):
+    """Rollup and partition catalog tables; safe to run on every start"""
+    # Per-hour aggregates; zone -1 holds the total for the hour, camera and
+    # class, zones >= 0 count the detections touching each grid zone
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS detection_rollups (
+            hour_start INTEGER NOT NULL,
+            camera TEXT NOT NULL,
+            class TEXT NOT NULL,
+            zone INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (hour_start, camera, class, zone)
+        ) WITHOUT ROWID
+    """)
+    # Highest detection id already folded into the rollups
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS rollup_state (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        )
+    """)
+    # One row per UTC day of detection data; once prune_started_at is set
+    # the day's raw rows are going away and its rollups are final
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS detection_partitions (
+            day INTEGER PRIMARY KEY,
+            row_count INTEGER,
+            rolled_up_at REAL,
+            archived_at REAL,
+            prune_started_at REAL,
+            pruned_at REAL
+        )
+    """)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(detection_partitions)")}
+    if 'prune_started_at' not in columns:
+        conn.execute("ALTER TABLE detection_partitions ADD COLUMN prune_started_at REAL")
+
+
+def day_of(epoch: float) -> int:
+    return int(epoch // DAY)
+
+
+def day_bounds(day: int):
+    return day * DAY, (day + 1) * DAY
+
+
+def sql_timestamp(epoch: float) -> str:
+    """UTC text timestamp comparable with CURRENT_TIMESTAMP columns"""
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+ROLLUP_GROUPS = """
+    SELECT CAST(detected_at / {hour} AS INTEGER) * {hour}, camera, class,
+           zone_mask, COUNT(*)
+    FROM detections
+    WHERE {where}
+    GROUP BY 1, 2, 3, 4
+"""
+
+
+def rollup_counts(groups) -> Dict[tuple, int]:
+    """Expand (hour_start, camera, class, zone_mask, count) groups into rollup keys"""
+    counts: Dict[tuple, int] = {}
+    for hour_start, camera, cls, zone_mask, count in groups:
+        zone_mask = zone_mask or 0
+        zones = [z for z in range(zone_mask.bit_length()) if zone_mask >> z & 1]
+        for zone in [-1] + zones:
+            key = (hour_start, camera, cls, zone)
+            counts[key] = counts.get(key, 0) + count
+    return counts
+
+
+def refresh_rollups(conn) -> int:
+    """Fold detections added since the last refresh into the rollups
+
+    Must run on the writer connection: detection ids only grow and all
+    writes are serialized, so the stored high-water mark splits events
+    exactly into already-counted and new.  Returns the new row count.
+    """
+    row = conn.execute("SELECT value FROM rollup_state WHERE name = 'detections'").fetchone()
+    watermark = row[0] if row else 0
+    latest = conn.execute("SELECT MAX(id) FROM detections").fetchone()[0]
+    if latest is None or latest <= watermark:
+        return 0
+
+    groups = conn.execute(ROLLUP_GROUPS.format(hour=HOUR, where="id > ? AND id <= ?"),
+                          (watermark, latest)).fetchall()
+    counts = rollup_counts(groups)
+    conn.executemany("""
+        INSERT INTO detection_rollups (hour_start, camera, class, zone, count)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(hour_start, camera, class, zone) DO UPDATE SET
+            count = count + excluded.count
+    """, [key + (count,) for key, count in counts.items()])
+
+    per_day: Dict[int, int] = {}
+    for (hour_start, _, _, zone), count in counts.items():
+        if zone == -1:
+            per_day[day_of(hour_start)] = per_day.get(day_of(hour_start), 0) + count
+    now = time.time()
+    conn.executemany("""
+        INSERT INTO detection_partitions (day, row_count, rolled_up_at)
+        VALUES (?, ?, ?)
+        ON CONFLICT(day) DO UPDATE SET
+            row_count = COALESCE(row_count, 0) + excluded.row_count,
+            rolled_up_at = excluded.rolled_up_at
+    """, [(day, count, now) for day, count in per_day.items()])
+
+    conn.execute("""
+        INSERT INTO rollup_state (name, value) VALUES ('detections', ?)
+        ON CONFLICT(name) DO UPDATE SET value = excluded.value
+    """, (latest,))
+    return sum(per_day.values())
+
+
+class RetentionManager:
+    """Daily partitioning, hourly rollups and pruning of detection data
+
+    Raw detections are treated as one partition per UTC day of
+    ``detected_at``.  New events are folded incrementally into
+    ``detection_rollups`` (per hour, camera, class and zone); a day's
+    rollup is rebuilt from its raw rows once more before they are
+    archived and pruned after ``raw_days``.  Vehicle records are pruned
+    after ``vehicle_days`` and rollups after ``rollup_days``.  Deletes
+    run in small batches so the shared writer is never held for long.
+    An attached ``analytics`` engine has its cache cleared after each prune.
+    """
+
+    def __init__(self, db, raw_days: int = 7, rollup_days: int = 365,
+                 vehicle_days: Optional[int] = 90, archive_dir: Optional[str] = None,
+                 interval: float = 3600.0, delete_batch: int = 5000, analytics=None):
+        self.db = db
+        self.analytics = analytics
+        self.raw_days = raw_days
+        self.rollup_days = rollup_days
+        self.vehicle_days = vehicle_days
+        self.archive_dir = archive_dir
+        self.interval = interval
+        self.delete_batch = delete_batch
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _partition(self, day: int) -> Dict:
+        with self.db.pool.reader() as conn:
+            row = conn.execute(
+                "SELECT row_count, archived_at, prune_started_at, pruned_at "
+                "FROM detection_partitions WHERE day = ?", (day,)
+            ).fetchone()
+        keys = ('row_count', 'archived_at', 'prune_started_at', 'pruned_at')
+        return dict(zip(keys, row)) if row else dict.fromkeys(keys)
+
+    def rollup_day(self, day: int) -> int:
+        """Rebuild the hourly rollups of one day from raw rows; returns its row count
+
+        A day whose raw rows have started being pruned is left alone:
+        rebuilding it from what is left would lose the deleted counts.
+        """
+        start, end = day_bounds(day)
+        with self.db.pool.writer() as conn:
+            # Catch up first so the rebuilt day and the watermark agree
+            refresh_rollups(conn)
+            row = conn.execute(
+                "SELECT row_count, prune_started_at FROM detection_partitions WHERE day = ?", (day,)
+            ).fetchone()
+            if row is not None and row[1] is not None:
+                return row[0] or 0
+            groups = conn.execute(ROLLUP_GROUPS.format(hour=HOUR, where="detected_at >= ? AND detected_at < ?"),
+                                  (start, end)).fetchall()
+            counts = rollup_counts(groups)
+            row_count = sum(count for key, count in counts.items() if key[3] == -1)
+            conn.execute("DELETE FROM detection_rollups WHERE hour_start >= ? AND hour_start < ?",
+                         (start, end))
+            conn.executemany(
+                "INSERT INTO detection_rollups (hour_start, camera, class, zone, count) VALUES (?, ?, ?, ?, ?)",
+                [key + (count,) for key, count in counts.items()]
+            )
+            conn.execute("""
+                INSERT INTO detection_partitions (day, row_count, rolled_up_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT(day) DO UPDATE SET
+                    row_count = excluded.row_count,
+                    rolled_up_at = excluded.rolled_up_at
+            """, (day, row_count, time.time()))
+        return row_count
+
+    def rollup_pending(self) -> int:
+        """Fold new detections into the rollups; returns how many"""
+        with self.db.pool.writer() as conn:
+            return refresh_rollups(conn)
+
+    def archive_day(self, day: int):
+        """Copy a day's raw detections into a per-day SQLite file
+
+        The file is written under a temporary name and renamed into place,
+        so a retried archive replaces a partial one instead of appending.
+        """
+        os.makedirs(self.archive_dir, exist_ok=True)
+        stamp = datetime.fromtimestamp(day * DAY, timezone.utc).strftime('%Y%m%d')
+        path = os.path.join(self.archive_dir, f"detections_{stamp}.db")
+        partial = path + '.partial'
+        if os.path.exists(partial):
+            os.remove(partial)
+        start, end = day_bounds(day)
+        with self.db.pool.reader() as conn:
+            cur = conn.execute("SELECT * FROM detections WHERE detected_at >= ? AND detected_at < ?",
+                               (start, end))
+            columns = [c[0] for c in cur.description]
+            rows = cur.fetchall()
+        archive = sqlite3.connect(partial)
+        try:
+            with archive:
+                archive.execute(f"CREATE TABLE detections ({', '.join(columns)})")
+                archive.executemany(
+                    f"INSERT INTO detections VALUES ({', '.join('?' * len(columns))})", rows
+                )
+        finally:
+            archive.close()
+        os.replace(partial, path)
+        with self.db.pool.writer() as conn:
+            conn.execute("UPDATE detection_partitions SET archived_at = ? WHERE day = ?",
+                         (time.time(), day))
+        return path
+
+    def _days_with_rows(self, before_day: int):
+        """Days before ``before_day`` that still have raw detections, oldest first
+
+        Each step is one index seek to the next detection, so gaps in the
+        data cost nothing and no catalog rows are made for empty days.
+        """
+        start = float('-inf')
+        while True:
+            with self.db.pool.reader() as conn:
+                first = conn.execute("SELECT MIN(detected_at) FROM detections WHERE detected_at >= ?",
+                                     (start,)).fetchone()[0]
+            if first is None or day_of(first) >= before_day:
+                return
+            day = day_of(first)
+            yield day
+            start = (day + 1) * DAY
+
+    def _delete_batches(self, table: str, where: str, params) -> Tuple[int, bool]:
+        """(rows deleted, whether every matching row is gone); stops early on ``stop``"""
+        deleted = 0
+        while not self._stop.is_set():
+            with self.db.pool.writer() as conn:
+                cur = conn.execute(
+                    f"DELETE FROM {table} WHERE rowid IN "
+                    f"(SELECT rowid FROM {table} WHERE {where} LIMIT ?)",
+                    (*params, self.delete_batch)
+                )
+            deleted += cur.rowcount
+            if cur.rowcount < self.delete_batch:
+                return deleted, True
+        return deleted, False
+
+    def prune(self, now: Optional[float] = None) -> Dict[str, int]:
+        """Drop expired partitions, vehicle records and rollups"""
+        try:
+            return self._prune(now)
+        finally:
+            # Rollups may have been rebuilt or deleted even if pruning failed
+            if self.analytics is not None:
+                self.analytics.invalidate()
+
+    def _prune(self, now: Optional[float]) -> Dict[str, int]:
+        now = now if now is not None else time.time()
+        cutoff_day = day_of(now) - self.raw_days
+        result = {'detections': 0, 'vehicle_records': 0, 'rollups': 0}
+
+        for day in self._days_with_rows(cutoff_day):
+            if self._stop.is_set():
+                break
+            partition = self._partition(day)
+            if partition['prune_started_at'] is None:
+                self.rollup_day(day)
+                if self.archive_dir and partition['archived_at'] is None:
+                    self.archive_day(day)
+                with self.db.pool.writer() as conn:
+                    conn.execute("""
+                        INSERT INTO detection_partitions (day, prune_started_at) VALUES (?, ?)
+                        ON CONFLICT(day) DO UPDATE SET prune_started_at = excluded.prune_started_at
+                    """, (day, time.time()))
+            start, end = day_bounds(day)
+            deleted, finished = self._delete_batches(
+                'detections', "detected_at >= ? AND detected_at < ?", (start, end)
+            )
+            result['detections'] += deleted
+            if finished:
+                with self.db.pool.writer() as conn:
+                    conn.execute("UPDATE detection_partitions SET pruned_at = ? WHERE day = ?",
+                                 (time.time(), day))
+
+        if self.vehicle_days is not None:
+            result['vehicle_records'] = self._delete_batches(
+                'vehicle_records', "detected_at < ?",
+                (sql_timestamp(now - self.vehicle_days * DAY),)
+            )[0]
+
+        # Rollups are keyed by hour_start, so this is a single range delete
+        rollup_cutoff = (day_of(now) - self.rollup_days) * DAY
+        with self.db.pool.writer() as conn:
+            result['rollups'] = conn.execute(
+                "DELETE FROM detection_rollups WHERE hour_start < ?", (rollup_cutoff,)
+            ).rowcount
+            conn.execute("DELETE FROM detection_partitions WHERE day < ?",
+                         (day_of(now) - self.rollup_days,))
+        return result
+
+    def run_once(self, now: Optional[float] = None):
+        self.rollup_pending()
+        return self.prune(now)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Error running retention: {str(e)}")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Run rollup and pruning in the background every ``interval`` seconds"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='retention', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
@@ -0,0 +1,179 @@
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from detection_service import DetectionService
+
+
+class CameraStream:
+    """Per-camera detection state: background model, sensitivity and history"""
+
+    def __init__(self, name: str, sensitivity: int = 75, frame_budget: int = 1,
+                 queue_depth: int = 2, backend=None, event_writer=None,
+                 motion_backend: str = 'frame_diff'):
+        self.name = name
+        self.service = DetectionService(backend)
+        self.service.set_motion_backend(motion_backend)
+        self.service.camera_id = name
+        self.service.event_writer = event_writer
+        self.service.set_sensitivity(sensitivity)
+        self.sensitivity = sensitivity
+        self.frame_budget = max(1, int(frame_budget))
+        self.pending = deque(maxlen=max(1, int(queue_depth)))
+        self.busy = False
+        self.latest = None
+        self.frames_processed = 0
+        self.frames_dropped = 0
+
+    def set_sensitivity(self, sensitivity: int):
+        self.sensitivity = sensitivity
+        self.service.set_sensitivity(sensitivity)
+
+
+class StreamManager:
+    """Schedules detection for several cameras on one shared worker pool
+
+    Cameras are visited round-robin; each turn a camera may dispatch up to
+    its ``frame_budget`` queued frames.  A camera never has more than one
+    frame in flight because motion detection depends on the previous
+    frame, so a slow camera only delays itself.  Frames that arrive while
+    a camera's queue is full replace the oldest queued frame.
+    """
+
+    def __init__(self, workers: int = 4,
+                 on_result: Optional[Callable[[str, list, object], None]] = None,
+                 backend=None, event_writer=None):
+        self.workers = max(1, int(workers))
+        self.on_result = on_result
+        # Optional cascade backend and DetectionWriter shared by every camera
+        self.backend = backend
+        self.event_writer = event_writer
+        self.cameras: Dict[str, CameraStream] = {}
+        self._order: List[str] = []
+        self._next = 0
+        self._cond = threading.Condition()
+        self._executor = None
+        self._scheduler = None
+        self._running = False
+
+    def add_camera(self, name: str, sensitivity: int = 75, frame_budget: int = 1,
+                   queue_depth: int = 2, motion_backend: str = 'frame_diff') -> CameraStream:
+        """Register a camera; ``motion_backend`` names its own background model"""
+        with self._cond:
+            if name in self.cameras:
+                return self.cameras[name]
+            stream = CameraStream(name, sensitivity, frame_budget, queue_depth,
+                                  self.backend, self.event_writer, motion_backend)
+            self.cameras[name] = stream
+            self._order.append(name)
+            return stream
+
+    def remove_camera(self, name: str):
+        with self._cond:
+            if self.cameras.pop(name, None) is not None:
+                index = self._order.index(name)
+                del self._order[index]
+                # Keep the round-robin position on the camera that was next
+                if index < self._next:
+                    self._next -= 1
+                if self._next >= len(self._order):
+                    self._next = 0
+
+    def set_sensitivity(self, name: str, sensitivity: int):
+        with self._cond:
+            self.cameras[name].set_sensitivity(sensitivity)
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return self
+            self._running = True
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix='stream'
+        )
+        self._scheduler = threading.Thread(
+            target=self._schedule_loop, name='stream-scheduler', daemon=True
+        )
+        self._scheduler.start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._scheduler is not None:
+            self._scheduler.join(timeout=1.0)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def submit_frame(self, name: str, image):
+        """Queue a frame (PIL image) for a camera"""
+        with self._cond:
+            stream = self.cameras[name]
+            if len(stream.pending) == stream.pending.maxlen:
+                stream.frames_dropped += 1
+            stream.pending.append(image)
+            self._cond.notify()
+
+    def _next_batch(self):
+        """Pick the next ready camera in round-robin order"""
+        count = len(self._order)
+        for offset in range(count):
+            index = (self._next + offset) % count
+            stream = self.cameras[self._order[index]]
+            if stream.pending and not stream.busy:
+                self._next = (index + 1) % count
+                frames = []
+                while stream.pending and len(frames) < stream.frame_budget:
+                    frames.append(stream.pending.popleft())
+                stream.busy = True
+                return stream, frames
+        return None, None
+
+    def _schedule_loop(self):
+        while True:
+            with self._cond:
+                stream, frames = self._next_batch()
+                while self._running and stream is None:
+                    self._cond.wait()
+                    stream, frames = self._next_batch()
+                if not self._running:
+                    if stream is not None:
+                        stream.busy = False
+                    return
+            self._executor.submit(self._process, stream, frames)
+
+    def _process(self, stream: CameraStream, frames):
+        try:
+            for image in frames:
+                detections, result_image = stream.service.process_image(image)
+                stream.service.update_detection_history(detections)
+                stream.latest = (detections, result_image)
+                stream.frames_processed += 1
+                if self.on_result is not None:
+                    self.on_result(stream.name, detections, result_image)
+        except Exception as e:
+            print(f"Error processing stream {stream.name}: {str(e)}")
+        finally:
+            with self._cond:
+                stream.busy = False
+                self._cond.notify()
+
+    def latest_result(self, name: str):
+        """Most recent (detections, image) for a camera, or None"""
+        return self.cameras[name].latest
+
+    def get_statistics(self) -> Dict[str, Dict]:
+        """Per-camera detection statistics and frame counters"""
+        with self._cond:
+            streams = list(self.cameras.values())
+        return {
+            stream.name: {
+                **stream.service.get_detection_statistics(),
+                'frames_processed': stream.frames_processed,
+                'frames_dropped': stream.frames_dropped,
+                'queued': len(stream.pending)
+            }
+            for stream in streams
+        }
@@ -0,0 +1,212 @@
+from typing import Dict, Optional
+
+import numpy as np
+
+# Constant-velocity model over (cx, cy, vx, vy); only the centre is observed
+_H = np.array([[1, 0, 0, 0], [0, 1, 0, 0]], dtype=np.float64)
+_I4 = np.eye(4)
+
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU between (N, 4) and (M, 4) arrays of x1, y1, x2, y2 boxes"""
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
+
+
+def greedy_match(score: np.ndarray, threshold: float):
+    """Match rows to columns by descending score above threshold
+
+    Same result as taking pairs one by one in descending score order, but
+    in rounds: a pair ranked first among the remaining pairs of both its
+    row and its column would be taken by that sequential pass, so each
+    round takes all such pairs at once and drops the pairs they conflict
+    with.  Ties go to the earlier pair in row-major order.  Pairs are
+    returned best first.
+    """
+    rows, cols = np.nonzero(score > threshold)
+    if not len(rows):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    order = np.argsort(-score[rows, cols], kind='stable')
+    sorted_rows, sorted_cols = rows[order], cols[order]
+    rows, cols = sorted_rows, sorted_cols
+    position = np.arange(len(rows))
+
+    row_first = np.empty(score.shape[0], dtype=np.int64)
+    col_first = np.empty(score.shape[1], dtype=np.int64)
+    row_used = np.zeros(score.shape[0], dtype=bool)
+    col_used = np.zeros(score.shape[1], dtype=bool)
+    taken = []
+    while len(rows):
+        # Earliest remaining pair of every row and column (with repeated
+        # indices the last assignment wins, so assign in reverse)
+        rank = np.arange(len(rows))
+        row_first[rows[::-1]] = rank[::-1]
+        col_first[cols[::-1]] = rank[::-1]
+        take = (row_first[rows] == rank) & (col_first[cols] == rank)
+        taken.append(position[take])
+        row_used[rows[take]] = True
+        col_used[cols[take]] = True
+        keep = ~(row_used[rows] | col_used[cols])
+        rows, cols, position = rows[keep], cols[keep], position[keep]
+
+    taken = np.sort(np.concatenate(taken))
+    return sorted_rows[taken], sorted_cols[taken]
+
+
+class MultiObjectTracker:
+    """IoU/centroid tracker with a vectorized Kalman predictor
+
+    All track state lives in parallel numpy arrays, so prediction, the IoU
+    cost matrix and the Kalman update each run as one batched operation.
+    Detections are first matched to predicted boxes by IoU; leftovers are
+    then matched by centroid distance within ``max_distance`` pixels.
+    Tracks unmatched for more than ``max_age`` updates are dropped, so
+    memory stays bounded by the number of live objects.
+    """
+
+    def __init__(self, iou_threshold: float = 0.3, max_distance: float = 80.0,
+                 max_age: int = 15, min_hits: int = 2,
+                 process_noise: float = 4.0, measurement_noise: float = 16.0):
+        self.iou_threshold = iou_threshold
+        self.max_distance = max_distance
+        self.max_age = max_age
+        self.min_hits = min_hits
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self._next_id = 0
+        self.last_timestamp = None
+
+        self.ids = np.empty(0, dtype=np.int64)
+        self.state = np.empty((0, 4))
+        self.covariance = np.empty((0, 4, 4))
+        self.size = np.empty((0, 2))
+        self.hits = np.empty(0, dtype=np.int64)
+        self.misses = np.empty(0, dtype=np.int64)
+        self.updated_at = np.empty(0)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def predicted_boxes(self) -> np.ndarray:
+        """Current track boxes as (N, 4) x1, y1, x2, y2"""
+        half = self.size / 2
+        centre = self.state[:, :2]
+        return np.hstack([centre - half, centre + half])
+
+    def _predict(self, dt: float):
+        if not len(self.ids):
+            return
+        F = np.array([[1, 0, dt, 0], [0, 1, 0, dt], [0, 0, 1, 0], [0, 0, 0, 1]])
+        Q = np.diag([dt, dt, 1.0, 1.0]) * self.process_noise
+        self.state = self.state @ F.T
+        self.covariance = F @ self.covariance @ F.T + Q
+
+    def _correct(self, rows: np.ndarray, centres: np.ndarray, sizes: np.ndarray):
+        P = self.covariance[rows]
+        S = P[:, :2, :2] + np.eye(2) * self.measurement_noise
+        K = P[:, :, :2] @ np.linalg.inv(S)
+        innovation = centres - self.state[rows, :2]
+        self.state[rows] += np.einsum('nij,nj->ni', K, innovation)
+        self.covariance[rows] = (_I4 - K @ _H) @ P
+        self.size[rows] = 0.7 * self.size[rows] + 0.3 * sizes
+
+    def update(self, boxes, timestamp: Optional[float] = None) -> np.ndarray:
+        """Associate (M, 4) x, y, w, h boxes with tracks; returns M track ids
+
+        ``timestamp`` is the capture time in seconds; without it each call
+        advances the model by one frame.  Ids of unconfirmed tracks (fewer
+        than ``min_hits`` matches) are reported as -1.
+        """
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        dt = 1.0
+        if timestamp is not None:
+            if self.last_timestamp is not None:
+                dt = max(timestamp - self.last_timestamp, 1e-3)
+            self.last_timestamp = timestamp
+        now = timestamp if timestamp is not None else 0.0
+
+        self._predict(dt)
+        self.misses += 1
+
+        centres = boxes[:, :2] + boxes[:, 2:] / 2
+        sizes = boxes[:, 2:]
+        xyxy = np.hstack([boxes[:, :2], boxes[:, :2] + sizes])
+        assigned = np.full(len(boxes), -1, dtype=np.int64)
+
+        if len(self.ids) and len(boxes):
+            track_rows, det_cols = greedy_match(
+                iou_matrix(self.predicted_boxes(), xyxy), self.iou_threshold
+            )
+
+            free_tracks = np.setdiff1d(np.arange(len(self.ids)), track_rows)
+            free_dets = np.setdiff1d(np.arange(len(boxes)), det_cols)
+            if len(free_tracks) and len(free_dets):
+                dist = np.linalg.norm(
+                    self.state[free_tracks, None, :2] - centres[None, free_dets], axis=2
+                )
+                r, c = greedy_match(self.max_distance - dist, 0.0)
+                track_rows = np.concatenate([track_rows, free_tracks[r]])
+                det_cols = np.concatenate([det_cols, free_dets[c]])
+
+            if len(track_rows):
+                self._correct(track_rows, centres[det_cols], sizes[det_cols])
+                self.hits[track_rows] += 1
+                self.misses[track_rows] = 0
+                self.updated_at[track_rows] = now
+                assigned[det_cols] = track_rows
+
+        # Start tracks for unmatched detections
+        new = np.flatnonzero(assigned < 0)
+        if len(new):
+            start = len(self.ids)
+            count = len(new)
+            state = np.zeros((count, 4))
+            state[:, :2] = centres[new]
+            covariance = np.tile(np.diag([self.measurement_noise] * 2 + [100.0] * 2), (count, 1, 1))
+            self.ids = np.concatenate([self.ids, np.arange(self._next_id, self._next_id + count)])
+            self._next_id += count
+            self.state = np.vstack([self.state, state])
+            self.covariance = np.concatenate([self.covariance, covariance])
+            self.size = np.vstack([self.size, sizes[new]])
+            self.hits = np.concatenate([self.hits, np.ones(count, dtype=np.int64)])
+            self.misses = np.concatenate([self.misses, np.zeros(count, dtype=np.int64)])
+            self.updated_at = np.concatenate([self.updated_at, np.full(count, now)])
+            assigned[new] = np.arange(start, start + count)
+
+        track_ids = np.where(
+            self.hits[assigned] >= self.min_hits, self.ids[assigned], -1
+        )
+        self._expire()
+        return track_ids
+
+    def _expire(self):
+        keep = self.misses <= self.max_age
+        if keep.all():
+            return
+        self.ids = self.ids[keep]
+        self.state = self.state[keep]
+        self.covariance = self.covariance[keep]
+        self.size = self.size[keep]
+        self.hits = self.hits[keep]
+        self.misses = self.misses[keep]
+        self.updated_at = self.updated_at[keep]
+
+    def active_tracks(self) -> Dict[int, Dict]:
+        """Confirmed tracks seen in the latest update, keyed by id"""
+        live = np.flatnonzero((self.misses == 0) & (self.hits >= self.min_hits))
+        return {
+            int(self.ids[i]): {
+                'center': tuple(self.state[i, :2].tolist()),
+                'velocity': tuple(self.state[i, 2:].tolist()),
+                'size': tuple(self.size[i].tolist()),
+                'timestamp': float(self.updated_at[i])
+            }
+            for i in live
+        }
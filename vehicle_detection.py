@@ -1,15 +1,27 @@
 import cv2
 import numpy as np
-import easyocr
+import time
 from typing import Tuple, Dict, List
+from detection import Detection, DetectionClass
+from tracker import MultiObjectTracker
+from color_classifier import ColorClassifier
+from kinematics import Calibration, KinematicsEstimator
 
 class VehicleDetector:
-    def __init__(self):
+    def __init__(self, ocr_stage=None, camera_id='default', reader=None, calibration=None):
         self.plate_cascade = cv2.CascadeClassifier(
             cv2.data.haarcascades + 'haarcascade_russian_plate_number.xml'
         )
-        self.reader = easyocr.Reader(['en'])
-        self.prev_positions = {}  # Store previous positions for speed calculation
+        # easyocr reader; pass a shared one to avoid loading the model per detector
+        self._reader = reader
+        # Optional shared PlateOCRStage; OCR then runs batched off-thread
+        self.ocr_stage = ocr_stage
+        self.camera_id = camera_id
+        self.tracker = MultiObjectTracker(min_hits=1)
+        # Plates get their own track ids so OCR results are cached per plate
+        self.plate_tracker = MultiObjectTracker(min_hits=1)
+        # Ground-plane speed and heading per track; pass this camera's Calibration
+        self.kinematics = KinematicsEstimator(calibration or Calibration())
         self.color_ranges = {
             'red': ([0, 50, 50], [10, 255, 255]),
             'blue': ([110, 50, 50], [130, 255, 255]),
@@ -17,9 +29,44 @@ class VehicleDetector:
             'white': ([0, 0, 200], [180, 30, 255]),
             'black': ([0, 0, 0], [180, 255, 30])
         }
+        self.color_classifier = ColorClassifier(self.color_ranges)
+
+    @property
+    def reader(self):
+        """The easyocr reader, imported and loaded on first use"""
+        if self._reader is None:
+            import easyocr
+            self._reader = easyocr.Reader(['en'])
+        return self._reader
 
     def detect_plate(self, frame) -> Tuple[np.ndarray, List[str]]:
         """Detect and recognize license plates in the frame"""
+        frame, detections = self.plate_detections(frame)
+        return frame, [det.label for det in detections]
+
+    def read_plate(self, plate_region, track_id=None):
+        """Return (text, confidence) for a plate crop, or None if not read yet
+
+        With an OCR stage, a crop that is queued rather than served from
+        the cache falls back to the last reading published for the track.
+        """
+        if self.ocr_stage is not None:
+            reading = self.ocr_stage.submit(self.camera_id, track_id, plate_region)
+            if reading is None and track_id is not None:
+                reading = self.ocr_stage.result(self.camera_id, track_id)
+            return reading
+
+        results = self.reader.readtext(plate_region)
+        if results:
+            return results[0][1], results[0][2]
+        return None
+
+    def plate_detections(self, frame, timestamp=None) -> Tuple[np.ndarray, List[Detection]]:
+        """Detect license plates and return them as Detection records
+
+        Plates are tracked across frames, so OCR results are cached and
+        looked up per plate track rather than per exact crop.
+        """
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
         plates = self.plate_cascade.detectMultiScale(
             gray,
@@ -28,8 +75,14 @@ class VehicleDetector:
             minSize=(25, 25)
         )
 
-        plate_texts = []
-        for (x, y, w, h) in plates:
+        plates = np.asarray(plates, dtype=np.int64).reshape(-1, 4)
+        track_ids = self.plate_tracker.update(
+            plates, time.monotonic() if timestamp is None else timestamp
+        )
+
+        detections = []
+        timestamp_ns = time.monotonic_ns()
+        for (x, y, w, h), track_id in zip(plates.tolist(), track_ids.tolist()):
             # Draw rectangle around plate
             cv2.rectangle(frame, (x, y), (x+w, y+h), (0, 255, 0), 2)
 
@@ -37,10 +90,13 @@ class VehicleDetector:
             plate_region = gray[y:y+h, x:x+w]
 
             # OCR on plate region
-            results = self.reader.readtext(plate_region)
-            if results:
-                text = results[0][1]
-                plate_texts.append(text)
+            reading = self.read_plate(plate_region, track_id)
+            if reading:
+                text, confidence = reading
+                detections.append(Detection(
+                    DetectionClass.PLATE, confidence, (x, y, x+w, y+h),
+                    label=text, track_id=track_id, timestamp_ns=timestamp_ns
+                ))
                 cv2.putText(
                     frame,
                     text,
@@ -51,99 +107,65 @@ class VehicleDetector:
                     2
                 )
 
-        return frame, plate_texts
+        return frame, detections
 
     def detect_color(self, frame, bbox) -> str:
         """Detect dominant color of vehicle"""
-        x, y, w, h = bbox
-        vehicle_region = frame[y:y+h, x:x+w]
-        hsv = cv2.cvtColor(vehicle_region, cv2.COLOR_BGR2HSV)
-
-        max_pixels = 0
-        detected_color = "unknown"
-
-        for color, (lower, upper) in self.color_ranges.items():
-            mask = cv2.inRange(hsv, np.array(lower), np.array(upper))
-            pixels = cv2.countNonZero(mask)
-            if pixels > max_pixels:
-                max_pixels = pixels
-                detected_color = color
-
-        return detected_color
-
-    def estimate_speed(self, vehicle_id: str, bbox: Tuple[int, int, int, int], 
-                      fps: float = 30.0) -> float:
-        """Estimate vehicle speed based on position change"""
-        x, y, w, h = bbox
-        center = (x + w//2, y + h//2)
-
-        if vehicle_id not in self.prev_positions:
-            self.prev_positions[vehicle_id] = {
-                'position': center,
-                'time': cv2.getTickCount()
-            }
-            return 0.0
-
-        # Calculate pixel distance moved
-        prev = self.prev_positions[vehicle_id]['position']
-        prev_time = self.prev_positions[vehicle_id]['time']
-        current_time = cv2.getTickCount()
-
-        # Time difference in seconds
-        time_diff = (current_time - prev_time) / cv2.getTickFrequency()
-
-        # Calculate distance moved in pixels
-        pixel_distance = np.sqrt(
-            (center[0] - prev[0])**2 + (center[1] - prev[1])**2
-        )
-
-        # Convert pixel distance to meters (approximate)
-        meters_per_pixel = 0.1  # This should be calibrated based on camera setup
-        distance = pixel_distance * meters_per_pixel
-
-        # Calculate speed (m/s to km/h)
-        speed = (distance / time_diff) * 3.6
-
-        # Update previous position
-        self.prev_positions[vehicle_id] = {
-            'position': center,
-            'time': current_time
-        }
-
-        return speed
-
-    def determine_direction(self, vehicle_id: str, current_pos: Tuple[int, int]) -> str:
-        """Determine vehicle movement direction"""
-        if vehicle_id not in self.prev_positions:
-            return "unknown"
-
-        prev_pos = self.prev_positions[vehicle_id]['position']
-        dx = current_pos[0] - prev_pos[0]
-        dy = current_pos[1] - prev_pos[1]
-
-        if abs(dx) > abs(dy):
-            return "right" if dx > 0 else "left"
-        else:
-            return "down" if dy > 0 else "up"
+        return self.color_classifier.classify_boxes(frame, [bbox])[0]
 
     def analyze_vehicle(self, frame, bbox) -> Dict:
-        """Comprehensive vehicle analysis"""
-        x, y, w, h = bbox
-        vehicle_id = f"vehicle_{x}_{y}"
+        """Color and position of one vehicle box
 
-        # Get center position
+        One box is not a whole frame, so this does not touch the tracker
+        or the speed estimates; pass every box of a frame to
+        ``analyze_vehicles`` for track ids, speed and direction.
+        """
+        x, y, w, h = bbox
         center = (x + w//2, y + h//2)
-
-        # Analyze vehicle
-        color = self.detect_color(frame, (x, y, w, h))
-        speed = self.estimate_speed(vehicle_id, (x, y, w, h))
-        direction = self.determine_direction(vehicle_id, center)
-
         return {
-            'id': vehicle_id,
+            'id': f"vehicle_{x}_{y}",
+            'track_id': -1,
             'bbox': (x, y, w, h),
-            'color': color,
-            'speed': speed,
-            'direction': direction,
+            'color': self.detect_color(frame, (x, y, w, h)),
+            'speed': 0.0,
+            'heading': float('nan'),
+            'direction': 'unknown',
             'position': center
-        }
\ No newline at end of file
+        }
+
+    def analyze_vehicles(self, frame, bboxes, timestamp=None) -> List[Dict]:
+        """Analyze every vehicle box in a frame with stable track ids
+
+        ``timestamp`` is the frame's capture time in seconds; speeds are
+        only meaningful when it is supplied (arrival time is used otherwise).
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+        track_ids = self.tracker.update(bboxes, timestamp)
+
+        # Forget kinematics of tracks the tracker has expired
+        self.kinematics.forget(np.setdiff1d(self.kinematics.ids, self.tracker.ids))
+
+        # One HSV conversion and bincount for every vehicle in the frame
+        colors = self.color_classifier.classify_boxes(frame, bboxes)
+
+        boxes = np.asarray(bboxes, dtype=np.int64).reshape(-1, 4)
+        centers = boxes[:, :2] + boxes[:, 2:] // 2
+        speeds, headings, directions = self.kinematics.update(track_ids, centers, timestamp)
+
+        results = []
+        for bbox, track_id, color, center, speed, heading, direction in zip(
+                bboxes, track_ids.tolist(), colors, centers.tolist(),
+                speeds.tolist(), headings.tolist(), directions.tolist()):
+            results.append({
+                'id': f"vehicle_{track_id}",
+                'track_id': track_id,
+                'bbox': tuple(bbox),
+                'color': color,
+                'speed': speed,
+                'heading': heading,
+                'direction': direction,
+                'position': tuple(center)
+            })
+
+        return results
@@ -0,0 +1,75 @@
+import csv
+import json
+import os
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List
+
+RECORD_FIELDS = ('plate_number', 'owner_name', 'vehicle_type', 'notes', 'detected_at')
+
+
+def iter_csv(path: str) -> Iterator[Dict]:
+    with open(path, newline='', encoding='utf-8') as f:
+        yield from csv.DictReader(f)
+
+
+def iter_jsonl(path: str) -> Iterator[Dict]:
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def iter_records(path: str, file_format: str = None) -> Iterator[Dict]:
+    """Stream vehicle records from a CSV or JSONL file"""
+    if file_format is None:
+        file_format = os.path.splitext(path)[1].lstrip('.').lower()
+    if file_format == 'csv':
+        return iter_csv(path)
+    if file_format in ('jsonl', 'ndjson', 'json'):
+        return iter_jsonl(path)
+    raise ValueError(f"Unsupported import format: {file_format}")
+
+
+def normalize_timestamp(value):
+    """``detected_at`` in the column's own format, or None if missing
+
+    ISO-8601 strings (with or without an offset) and epoch seconds are
+    accepted and re-emitted as UTC ``YYYY-MM-DD HH:MM:SS``, the format
+    SQLite's CURRENT_TIMESTAMP default writes, so the TEXT column and
+    keyset cursors order correctly.  Raises ValueError otherwise.
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        parsed = datetime.fromtimestamp(value, timezone.utc)
+    else:
+        parsed = datetime.fromisoformat(str(value).strip())
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc)
+    return parsed.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def record_row(record: Dict):
+    """Tuple in RECORD_FIELDS order, or None if the record has no plate
+
+    Raises ValueError when ``detected_at`` cannot be parsed.
+    """
+    plate = record.get('plate_number')
+    plate = '' if plate is None else str(plate).strip()
+    if not plate:
+        return None
+    values = {field: record.get(field) or None for field in RECORD_FIELDS}
+    values['plate_number'] = plate
+    values['detected_at'] = normalize_timestamp(record.get('detected_at'))
+    return tuple(values[field] for field in RECORD_FIELDS)
+
+
+def chunked(records: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(records)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
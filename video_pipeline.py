@@ -0,0 +1,288 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+class StageCounter:
+    """Thread-safe throughput counter for one pipeline stage"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.dropped = 0
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add(self, n: int = 1):
+        with self._lock:
+            self.count += n
+
+    def drop(self, n: int = 1):
+        with self._lock:
+            self.dropped += n
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            elapsed = max(time.perf_counter() - self.started, 1e-9)
+            return {
+                'count': self.count,
+                'dropped': self.dropped,
+                'fps': self.count / elapsed
+            }
+
+
+class FrameRing:
+    """Bounded frame buffer that drops the oldest entry when full
+
+    Like ``queue.Queue``, every item taken with ``get`` counts as
+    outstanding until ``task_done`` is called, so ``idle`` only reports
+    True once nothing is buffered or being worked on.
+    """
+
+    def __init__(self, depth: int, counter: Optional[StageCounter] = None):
+        self.depth = max(1, int(depth))
+        self._items = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._outstanding = 0
+        self.counter = counter
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) >= self.depth:
+                self._items.popleft()
+                if self.counter is not None:
+                    self.counter.drop()
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout: Optional[float] = None):
+        """Return the oldest item, or None once closed and drained"""
+        with self._cond:
+            while not self._items and not self._closed:
+                if not self._cond.wait(timeout):
+                    return None
+            if self._items:
+                self._outstanding += 1
+                return self._items.popleft()
+            return None
+
+    def task_done(self):
+        with self._cond:
+            self._outstanding -= 1
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def idle(self) -> bool:
+        """True when no item is buffered or outstanding"""
+        with self._cond:
+            return not self._items and self._outstanding == 0
+
+    def __len__(self):
+        return len(self._items)
+
+
+class VideoPipeline:
+    """Decode -> prepare -> detect -> finish -> render pipeline for a cv2.VideoCapture
+
+    A decoder thread reads frames into a bounded ring buffer.  A pool of
+    workers runs the stateless ``prepare(frame)`` and ``finish(result)``
+    steps (color conversion, resizing) in parallel, while the stateful
+    ``process(prepared, seq)`` runs on a single detect thread that sees
+    frames strictly in decode order.  ``seq`` is the decode index, so the
+    detector can tell how many frames were dropped in between.  The
+    renderer only ever receives the newest finished result.  Stale frames
+    are dropped instead of queued, so a slow detector lowers the
+    processed frame rate rather than adding latency.  What must not be
+    dropped with a superseded result, such as a frame's detections, is
+    taken from it by ``events(result)`` on the detect thread and queued
+    in decode order for ``drain_events``.
+    """
+
+    def __init__(self, capture, process: Callable[[Any, int], Any],
+                 prepare: Optional[Callable[[Any], Any]] = None,
+                 finish: Optional[Callable[[Any], Any]] = None,
+                 decode_depth: int = 4, workers: int = 2,
+                 in_flight: Optional[int] = None,
+                 events: Optional[Callable[[Any], Iterable]] = None):
+        self.capture = capture
+        self.process = process
+        self.prepare = prepare
+        self.finish = finish
+        self.events = events
+        self.workers = max(1, int(workers))
+        self.in_flight = in_flight or self.workers * 2
+
+        self.counters = {
+            'decode': StageCounter('decode'),
+            'detect': StageCounter('detect'),
+            'render': StageCounter('render')
+        }
+        self.frames = FrameRing(decode_depth, self.counters['decode'])
+
+        self._executor = None
+        self._threads = []
+        self._stop = threading.Event()
+        self._resume = threading.Event()
+        self._resume.set()
+        self._slots = threading.Semaphore(self.in_flight)
+        # Prepared frames in decode order, waiting for the detect thread
+        self._ordered = queue.Queue()
+        # Per-frame events in decode order, waiting for the renderer
+        self._events = queue.Queue()
+        self._result_lock = threading.Lock()
+        self._latest: Optional[Tuple[int, Any]] = None
+        self._rendered_seq = -1
+        self._decode_done = threading.Event()
+
+    def start(self):
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix='prepare'
+        )
+        for target, name in ((self._decode_loop, 'decode'),
+                             (self._dispatch_loop, 'dispatch'),
+                             (self._detect_loop, 'detect')):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._resume.set()
+        self.frames.close()
+        self._ordered.put(None)
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def pause(self):
+        self._resume.clear()
+
+    def resume(self):
+        self._resume.set()
+
+    @property
+    def finished(self) -> bool:
+        """True once the source is exhausted and every frame was handled"""
+        return self._decode_done.is_set() and self.frames.idle
+
+    def _decode_loop(self):
+        seq = 0
+        try:
+            while not self._stop.is_set():
+                self._resume.wait()
+                if self._stop.is_set():
+                    break
+                ret, frame = self.capture.read()
+                if not ret:
+                    break
+                self.frames.put((seq, frame))
+                self.counters['decode'].add()
+                seq += 1
+        except Exception as e:
+            print(f"Error decoding video: {str(e)}")
+        finally:
+            self._decode_done.set()
+            self.frames.close()
+
+    def _dispatch_loop(self):
+        while not self._stop.is_set():
+            # Cap in-flight work so frames wait in the ring, where they can
+            # be dropped, rather than in the executor queue
+            if not self._slots.acquire(timeout=0.1):
+                continue
+            item = self.frames.get(timeout=0.1)
+            if item is None:
+                self._slots.release()
+                if self.frames.closed and not len(self.frames):
+                    break
+                continue
+            seq, frame = item
+            if self.prepare is None:
+                prepared = Future()
+                prepared.set_result(frame)
+            else:
+                prepared = self._executor.submit(self.prepare, frame)
+            self._ordered.put((seq, prepared))
+
+    def _detect_loop(self):
+        while True:
+            item = self._ordered.get()
+            if item is None or self._stop.is_set():
+                return
+            seq, prepared = item
+            try:
+                result = self.process(prepared.result(), seq)
+                self.counters['detect'].add()
+                if self.events is not None:
+                    for event in self.events(result):
+                        self._events.put(event)
+            except Exception as e:
+                print(f"Error processing frame: {str(e)}")
+                self._done()
+                continue
+            if self.finish is None:
+                self._store(seq, result)
+            else:
+                self._executor.submit(self._finish, seq, result)
+
+    def _finish(self, seq, result):
+        try:
+            result = self.finish(result)
+        except Exception as e:
+            print(f"Error processing frame: {str(e)}")
+            self._done()
+            return
+        self._store(seq, result)
+
+    def _store(self, seq, result):
+        with self._result_lock:
+            if self._latest is None or seq > self._latest[0]:
+                if self._latest is not None and self._latest[0] > self._rendered_seq:
+                    self.counters['render'].drop()
+                self._latest = (seq, result)
+            else:
+                self.counters['render'].drop()
+        self._done()
+
+    def _done(self):
+        self._slots.release()
+        self.frames.task_done()
+
+    def latest_result(self):
+        """Return the newest result not yet rendered, or None"""
+        with self._result_lock:
+            if self._latest is None or self._latest[0] <= self._rendered_seq:
+                return None
+            seq, result = self._latest
+            self._rendered_seq = seq
+        self.counters['render'].add()
+        return result
+
+    def drain_events(self) -> List:
+        """Every event queued since the last call, in decode order"""
+        events = []
+        while True:
+            try:
+                events.append(self._events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-stage throughput counters"""
+        stats = {name: c.snapshot() for name, c in self.counters.items()}
+        stats['decode']['queued'] = len(self.frames)
+        return stats